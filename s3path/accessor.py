@@ -1,13 +1,29 @@
+import os
 import sys
 import importlib.util
 from warnings import warn
-from os import stat_result
 from threading import Lock
-from itertools import chain
-from functools import lru_cache
+from itertools import chain, islice
+from functools import lru_cache, partial
 from contextlib import suppress
-from collections import namedtuple
-from io import UnsupportedOperation
+
+from .common import (
+    _NOT_FOUND_ERROR_CODES,
+    _ACCESS_DENIED_ERROR_CODES,
+    _MAX_DELETE_KEYS,
+    _MULTIPART_COPY_THRESHOLD,
+    _RANGED_READ_CHUNK_SIZE,
+    _READ_BUFFER_SIZE,
+    _CONFIGURATION_CACHE_SIZE,
+    _default_client_config,
+    _single_copy_transfer_config,
+    _pooled_copy_transfer_config,
+    _run_concurrently,
+    _configuration_names,
+    StatResult,
+    _MetadataCache,
+    _CloseCallbackWriter,
+)
 
 
 def _lazy_import_resources(name):
@@ -29,68 +45,58 @@ smart_open = _lazy_import_resources('smart_open')
 # boto3 increase startup time by X10!
 
 
-class StatResult(namedtuple('BaseStatResult', 'size, last_modified, version_id', defaults=(None,))):
-    """
-    Base of os.stat_result but with boto3 s3 features
-    """
-
-    def __getattr__(self, item):
-        if item in vars(stat_result):
-            raise UnsupportedOperation(f'{type(self).__name__} do not support {item} attribute')
-        return super().__getattribute__(item)
-
-    @property
-    def st_size(self) -> int:
-        return self.size
-
-    @property
-    def st_mtime(self) -> float:
-        return self.last_modified.timestamp()
-
-    @property
-    def st_version_id(self) -> str:
-        return self.version_id
-
-
 def stat(path, *, follow_symlinks=True):
     if not follow_symlinks:
         raise NotImplementedError(
             f'Setting follow_symlinks to {follow_symlinks} is unsupported on S3 service.')
     resource, config = configuration_map.get_configuration(path)
     if _is_versioned_path(path):
-        object_summary = _boto3_method_with_parameters(
-            resource.ObjectVersion(path.bucket, path.key, path.version_id).get,
+        response = _boto3_method_with_parameters(
+            resource.meta.client.head_object,
+            kwargs={'Bucket': path.bucket, 'Key': path.key, 'VersionId': path.version_id},
             config=config,
         )
         return StatResult(
-            size=object_summary.get('ContentLength'),
-            last_modified=object_summary.get('LastModified'),
-            version_id=object_summary.get('VersionId'))
-    object_summary = resource.ObjectSummary(path.bucket, path.key)
-    return StatResult(
-        size=object_summary.size,
-        last_modified=object_summary.last_modified,
-        version_id=None)
+            size=response.get('ContentLength'),
+            last_modified=response.get('LastModified'),
+            version_id=response.get('VersionId'))
+    return _head(path)
+
+
+def is_file(path):
+    from botocore.exceptions import ClientError
+    try:
+        stat(path)
+    except ClientError as client_error:
+        if client_error.response.get('Error', {}).get('Code') in _NOT_FOUND_ERROR_CODES:
+            return False
+        raise
+    return True
 
 
 def owner(path):
     bucket_name = path.bucket
     key_name = path.key
     resource, config = configuration_map.get_configuration(path)
-    object_summary = resource.ObjectSummary(bucket_name, key_name)
     # return object_summary.owner['DisplayName']
     # This is a hack till boto3 resolve this issue:
     # https://github.com/boto/boto3/issues/1950
+    # The key itself is listed before any other key it prefixes,
+    # so the listing also tells if the key exists
     response = _boto3_method_with_parameters(
-        object_summary.meta.client.list_objects_v2,
+        resource.meta.client.list_objects_v2,
         kwargs={
-            'Bucket': object_summary.bucket_name,
-            'Prefix': object_summary.key,
+            'Bucket': bucket_name,
+            'Prefix': key_name,
             'FetchOwner': True,
+            'MaxKeys': 1,
         },
         config=config,
     )
-    return response['Contents'][0]['Owner']['DisplayName']
+    contents = response.get('Contents')
+    if not contents or contents[0]['Key'] != key_name:
+        raise KeyError('file not found')
+    return contents[0]['Owner']['DisplayName']
 
 
 def rename(path, target):
@@ -98,34 +104,68 @@ def rename(path, target):
     source_key_name = path.key
     target_bucket_name = target.bucket
     target_key_name = target.key
-
     resource, config = configuration_map.get_configuration(path)
-    allowed_copy_args = boto3.s3.transfer.TransferManager.ALLOWED_COPY_ARGS
+    target_resource, target_config = configuration_map.get_configuration(target)
+    metadata_cache.invalidate(resource, source_bucket_name, source_key_name)
+    metadata_cache.invalidate(target_resource, target_bucket_name, target_key_name)
+    allowed_copy_args = frozenset(boto3.s3.transfer.TransferManager.ALLOWED_COPY_ARGS)
 
-    if not is_dir(path):
-        target_bucket = resource.Bucket(target_bucket_name)
-        object_summary = resource.ObjectSummary(source_bucket_name, source_key_name)
-        old_source = {'Bucket': object_summary.bucket_name, 'Key': object_summary.key}
+    # Boto3 resources aren't thread safe, the workers use only the client
+    client = resource.meta.client
+
+    def copy_key():
+        old_source = {'Bucket': source_bucket_name, 'Key': source_key_name}
         _boto3_method_with_extraargs(
-            target_bucket.copy,
+            client.copy,
             config=config,
-            args=(old_source, target_key_name),
+            args=(old_source, target_bucket_name, target_key_name),
+            kwargs={'Config': _single_copy_transfer_config()},
             allowed_extra_args=allowed_copy_args)
-        _boto3_method_with_parameters(object_summary.delete)
+
+    if not is_dir(path):
+        copy_key()
+        _boto3_method_with_parameters(
+            client.delete_object,
+            kwargs={'Bucket': source_bucket_name, 'Key': source_key_name},
+            config=config)
         return
 
-    bucket = resource.Bucket(source_bucket_name)
-    target_bucket = resource.Bucket(target_bucket_name)
-    for object_summary in bucket.objects.filter(Prefix=source_key_name):
-        old_source = {'Bucket': object_summary.bucket_name, 'Key': object_summary.key}
-        new_key = object_summary.key.replace(source_key_name, target_key_name)
-        _, config = configuration_map.get_configuration(type(path)(target_bucket_name, new_key))
+    source_prefix = _generate_prefix(path)
+    target_prefix = _generate_prefix(target)
+    transfer_config = _pooled_copy_transfer_config()
+
+    def copy(object_info):
+        key_name = object_info['Key']
+        old_source = {'Bucket': source_bucket_name, 'Key': key_name}
+        new_key = target_prefix + key_name[len(source_prefix):]
+        if object_info['Size'] < _MULTIPART_COPY_THRESHOLD:
+            # The managed copy would send a HeadObject and set up a transfer for each key
+            _boto3_method_with_parameters(
+                client.copy_object,
+                kwargs={'CopySource': old_source, 'Bucket': target_bucket_name, 'Key': new_key},
+                config=target_config)
+            return
         _boto3_method_with_extraargs(
-            target_bucket.copy,
-            config=config,
-            args=(old_source, new_key),
+            client.copy,
+            config=target_config,
+            args=(old_source, target_bucket_name, new_key),
+            kwargs={'Config': transfer_config},
             allowed_extra_args=allowed_copy_args)
-        _boto3_method_with_parameters(object_summary.delete)
+
+    source_keys = []
+    # The key prefix doesn't list a key named like the path itself, it is moved along with the keys it prefixes
+    if source_key_name and is_file(path):
+        copy_key()
+        source_keys.append(source_key_name)
+
+    # The keys are copied one listing page at a time, only their names are kept for the delete
+    objects = _list_objects(client, source_bucket_name, source_prefix, config=config)
+    batch = list(islice(objects, _MAX_DELETE_KEYS))
+    while batch:
+        _run_concurrently(copy, batch)
+        source_keys.extend(object_info['Key'] for object_info in batch)
+        batch = list(islice(objects, _MAX_DELETE_KEYS))
+    _delete_keys(client, source_bucket_name, source_keys, config=config)
 
 
 replace = rename
@@ -135,11 +175,25 @@ def rmdir(path):
     bucket_name = path.bucket
     key_name = path.key
     resource, config = configuration_map.get_configuration(path)
-    bucket = resource.Bucket(bucket_name)
-    for object_summary in bucket.objects.filter(Prefix=key_name):
-        _boto3_method_with_parameters(object_summary.delete, config=config)
+    metadata_cache.invalidate(resource, bucket_name, key_name)
+    client = resource.meta.client
+    # Only the keys under key + '/' are deleted, a key named like the path itself is left alone
+    _delete_keys(
+        client,
+        bucket_name,
+        (object_info['Key'] for object_info in _list_objects(client, bucket_name, _generate_prefix(path), config)),
+        config=config)
     if path.is_bucket:
-        _boto3_method_with_parameters(bucket.delete, config=config)
+        _boto3_method_with_parameters(resource.Bucket(bucket_name).delete, config=config)
+
+
+def touch(path):
+    resource, config = configuration_map.get_configuration(path)
+    metadata_cache.invalidate(resource, path.bucket, path.key)
+    _boto3_method_with_parameters(
+        resource.meta.client.put_object,
+        kwargs={'Bucket': path.bucket, 'Key': path.key, 'Body': b''},
+        config=config)
 
 
 def mkdir(path, mode):
@@ -155,12 +209,23 @@ def is_dir(path):
     if str(path) == path.root:
         return True
     resource, config = configuration_map.get_configuration(path)
-    bucket = resource.Bucket(path.bucket)
-    query = _boto3_method_with_parameters(
-        bucket.objects.filter,
-        kwargs={'Prefix': _generate_prefix(path)},
+    # One key is enough to prove that the prefix isn't empty
+    response = _boto3_method_with_parameters(
+        resource.meta.client.list_objects_v2,
+        kwargs={'Bucket': path.bucket, 'Prefix': _generate_prefix(path), 'MaxKeys': 1},
+        config=config)
+    return response.get('KeyCount', 0) > 0
+
+
+def _is_listed_key(path):
+    resource, config = configuration_map.get_configuration(path)
+    # The key itself is listed before any other key it prefixes
+    response = _boto3_method_with_parameters(
+        resource.meta.client.list_objects_v2,
+        kwargs={'Bucket': path.bucket, 'Prefix': path.key, 'MaxKeys': 1},
         config=config)
-    return any(query)
+    contents = response.get('Contents')
+    return bool(contents) and contents[0]['Key'] == path.key
 
 
 def exists(path):
@@ -184,30 +249,32 @@ def exists(path):
                     return False
             raise client_error
 
-    bucket = resource.Bucket(bucket_name)
-    key_name = str(path.key)
-
-    def query_method():
-        return _boto3_method_with_parameters(
-            bucket.object_versions.filter,
-            kwargs={'Prefix': key_name},
-            config=config)
-
-    if _is_versioned_path(path):
-        for object in query_method():
-            if object.version_id != path.version_id:
-                continue
-            if object.key == key_name:
+    if not _is_versioned_path(path):
+        # A HeadObject answers for keys, a one key listing is needed only for key prefixes
+        from botocore.exceptions import ClientError
+        try:
+            if is_file(path):
                 return True
-            if object.key.startswith(key_name + path._flavour.sep):
+        except ClientError as client_error:
+            if client_error.response.get('Error', {}).get('Code') not in _ACCESS_DENIED_ERROR_CODES:
+                raise
+            # HeadObject requires s3:GetObject, credentials that can only list the bucket look for the key itself
+            if _is_listed_key(path):
                 return True
-        return False
+        return is_dir(path)
 
-    for object in query_method():
-        if object.key == key_name:
-            return True
-        if object.key.startswith(key_name + path._flavour.sep):
-            return True
+    key_name = str(path.key)
+    client = resource.meta.client
+    kwargs = _update_kwargs_with_config(
+        client.list_object_versions,
+        config=config,
+        kwargs={'Bucket': bucket_name, 'Prefix': key_name})
+    for response in client.get_paginator('list_object_versions').paginate(**kwargs):
+        for version in chain(response.get('Versions', ()), response.get('DeleteMarkers', ())):
+            if version['VersionId'] != path.version_id:
+                continue
+            if version['Key'] == key_name or version['Key'].startswith(key_name + path._flavour.sep):
+                return True
     return False
 
 
@@ -216,22 +283,17 @@ def iter_keys(path, *, prefix=None, full_keys=True):
     bucket_name = path.bucket
 
     def get_keys():
-        continuation_token = None
-        while True:
-            if continuation_token:
-                kwargs['ContinuationToken'] = continuation_token
-            response = _boto3_method_with_parameters(
-                resource.meta.client.list_objects_v2,
-                kwargs=kwargs,
-                config=config,
-            )
+        client = resource.meta.client
+        paginator = client.get_paginator('list_objects_v2')
+        pages = paginator.paginate(**_update_kwargs_with_config(
+            client.list_objects_v2,
+            config=config,
+            kwargs={**kwargs, 'PaginationConfig': {'PageSize': 1000}}))
+        for response in pages:
             for file in response.get('Contents', ()):
                 yield file['Key']
             for folder in response.get('CommonPrefixes', ()):
                 yield folder['Prefix']
-            if not response.get('IsTruncated'):
-                break
-            continuation_token = response.get('NextContinuationToken')
 
     # get buckets
     if not bucket_name and not full_keys:
@@ -265,32 +327,33 @@ def scandir(path):
 
 def listdir(path):
     with scandir(path) as scandir_iter:
-        return [entry.name for entry in scandir_iter]
+        return list(scandir_iter.names())
 
 
 def open(path, *, mode='r', buffering=-1, encoding=None, errors=None, newline=None):
     resource, config = configuration_map.get_configuration(path)
+    if 'r' not in mode:
+        metadata_cache.invalidate(resource, path.bucket, path.key)
 
-    dummy_object = resource.Object('bucket', 'key')
-    get_object_kwargs = _update_kwargs_with_config(
-        dummy_object.meta.client.get_object, config=config)
+    client = resource.meta.client
+    get_object_kwargs = _update_kwargs_with_config(client.get_object, config=config)
     create_multipart_upload_kwargs = _update_kwargs_with_config(
-        dummy_object.meta.client.create_multipart_upload, config=config)
+        client.create_multipart_upload, config=config)
 
-
-    transport_params = {'defer_seek': True}
+    # smart_open doesn't use buffering for S3 keys, the reader fills its buffer by buffer_size
+    transport_params = {'defer_seek': True, 'buffer_size': max(buffering, _READ_BUFFER_SIZE)}
     if _is_versioned_path(path):
         transport_params['version_id'] = path.version_id
 
     transport_params.update(
-        client=resource.meta.client,
+        client=client,
         client_kwargs={
             'S3.Client.get_object': get_object_kwargs,
             'S3.Client.create_multipart_upload': create_multipart_upload_kwargs,
         },
     )
 
-    return smart_open.open(
+    file_object = smart_open.open(
         uri="s3:/" + str(path),
         mode=mode,
         buffering=buffering,
@@ -299,6 +362,49 @@ def open(path, *, mode='r', buffering=-1, encoding=None, errors=None, newline=No
         newline=newline,
         compression='disable',
         transport_params=transport_params)
+    if 'r' not in mode and configuration_map.get_general_options(path)['metadata_cache_ttl']:
+        # The key is replaced only when the writer is closed, a stat made while it was open cached the old key
+        file_object = _CloseCallbackWriter(file_object, partial(metadata_cache.invalidate, resource, path.bucket, path.key))
+    return file_object
+
+
+def read_bytes(path):
+    from botocore.exceptions import ClientError
+    resource, config = configuration_map.get_configuration(path)
+    client = resource.meta.client
+    kwargs = {'Bucket': path.bucket, 'Key': path.key}
+    if _is_versioned_path(path):
+        kwargs['VersionId'] = path.version_id
+
+    def get_range(start, **extra_kwargs):
+        end = start + _RANGED_READ_CHUNK_SIZE - 1
+        return _boto3_method_with_parameters(
+            client.get_object,
+            kwargs={**kwargs, **extra_kwargs, 'Range': f'bytes={start}-{end}'},
+            config=config)
+
+    # The first range tells the object size, small objects are read with this single request
+    try:
+        response = get_range(0)
+    except ClientError as client_error:
+        if client_error.response.get('Error', {}).get('Code') != 'InvalidRange':
+            raise
+        # Empty objects have no satisfiable range
+        response = _boto3_method_with_parameters(client.get_object, kwargs=kwargs, config=config)
+        return response['Body'].read()
+    if 'ContentRange' not in response:
+        # Servers may ignore the range and send the whole object (RFC 7233)
+        return response['Body'].read()
+    size = int(response['ContentRange'].rpartition('/')[2])
+    etag = response['ETag']
+
+    def read_range(start):
+        # IfMatch fails the read if the object is replaced in the middle
+        return get_range(start, IfMatch=etag)['Body'].read()
+
+    chunks = [response['Body'].read()]
+    chunks.extend(_run_concurrently(read_range, range(_RANGED_READ_CHUNK_SIZE, size, _RANGED_READ_CHUNK_SIZE)))
+    return b''.join(chunks)
 
 
 def get_presigned_url(path, expire_in: int) -> str:
@@ -315,23 +421,20 @@ def get_presigned_url(path, expire_in: int) -> str:
 
 
 def _generate_prefix(path):
-    sep = path._flavour.sep
-    if not path.key:
-        return ''
+    # Keys are normalized like posix paths, they never end with the separator
     key_name = path.key
-    if not key_name.endswith(sep):
-        return key_name + sep
-    return key_name
+    return key_name + '/' if key_name else ''
 
 
 def unlink(path, *args, **kwargs):
     bucket_name = path.bucket
     key_name = path.key
+    from botocore.exceptions import ClientError
     resource, config = configuration_map.get_configuration(path)
-    bucket = resource.Bucket(bucket_name)
+    metadata_cache.invalidate(resource, bucket_name, key_name)
     try:
         _boto3_method_with_parameters(
-            bucket.meta.client.delete_object,
+            resource.meta.client.delete_object,
             config=config,
             kwargs={"Bucket": bucket_name, "Key": key_name}
         )
@@ -339,17 +442,43 @@ def unlink(path, *args, **kwargs):
         raise OSError(f'/{bucket_name}/{key_name}')
 
 
+def clear_metadata_cache():
+    metadata_cache.clear()
+
+
+def _head(path):
+    bucket_name = path.bucket
+    key_name = path.key
+    resource, config = configuration_map.get_configuration(path)
+    stat_result = metadata_cache.get(resource, bucket_name, key_name)
+    if stat_result is not None:
+        return stat_result
+    response = _boto3_method_with_parameters(
+        resource.meta.client.head_object,
+        kwargs={'Bucket': bucket_name, 'Key': key_name},
+        config=config,
+    )
+    stat_result = StatResult(
+        size=response['ContentLength'],
+        last_modified=response['LastModified'],
+        version_id=None)
+    general_options = configuration_map.get_general_options(path)
+    metadata_cache.set(resource, bucket_name, key_name, stat_result, ttl=general_options['metadata_cache_ttl'])
+    return stat_result
+
+
 def _is_versioned_path(path):
     return hasattr(path, 'version_id') and bool(path.version_id)
 
 
 def _update_kwargs_with_config(boto3_method, config, kwargs=None):
     kwargs = kwargs or {}
-    if config is not None:
+    if config:
+        action_arguments = _get_action_arguments(boto3_method)
         kwargs.update({
             key: value
             for key, value in config.items()
-            if key in _get_action_arguments(boto3_method)
+            if key in action_arguments
         })
     return kwargs
 
@@ -378,19 +507,72 @@ def _boto3_method_with_extraargs(
     return boto3_method(*args, **kwargs)
 
 
-@lru_cache()
+def _list_objects(client, bucket_name, prefix, config=None):
+    """ Yield the ListObjectsV2 info of all the keys that start with prefix, one page at a time """
+    kwargs = _update_kwargs_with_config(
+        client.list_objects_v2,
+        config=config,
+        kwargs={'Bucket': bucket_name, 'Prefix': prefix, 'PaginationConfig': {'PageSize': 1000}})
+    for response in client.get_paginator('list_objects_v2').paginate(**kwargs):
+        yield from response.get('Contents', ())
+
+
+def _delete_keys(client, bucket_name, keys, config=None):
+    """ Delete the keys with DeleteObjects requests of up to 1000 keys """
+    keys = iter(keys)
+    batch = list(islice(keys, _MAX_DELETE_KEYS))
+    while batch:
+        response = _boto3_method_with_parameters(
+            client.delete_objects,
+            kwargs={
+                'Bucket': bucket_name,
+                'Delete': {'Objects': [{'Key': key} for key in batch], 'Quiet': True},
+            },
+            config=config)
+        errors = response.get('Errors')
+        if errors:
+            error = errors[0]
+            raise OSError(
+                f'failed to delete {len(errors)} keys, '
+                f'/{bucket_name}/{error["Key"]}: {error["Code"]} {error["Message"]}')
+        batch = list(islice(keys, _MAX_DELETE_KEYS))
+
+
 def _get_action_arguments(action):
-    docs = action.__doc__
-    with suppress(AttributeError):
-        docs = action.__doc__._generate()
-    return set(
-        line.replace(':param ', '').strip().strip(':')
-        for line in docs.splitlines()
-        if line.startswith(':param ')
-    )
+    owner = getattr(action, '__self__', None)
+    client_meta = getattr(owner, 'meta', None)
+    operation_name = getattr(client_meta, 'method_to_api_mapping', {}).get(action.__name__)
+    if operation_name is not None:
+        # Client operations, read the already parsed botocore model
+        return _get_operation_arguments(client_meta.service_model, operation_name)
+    # Resource actions are created for every resource object (with a new class),
+    # so their documented parameters are cached by name
+    cache_key = (type(owner).__qualname__, action.__name__) if owner is not None else action
+    arguments = _documented_arguments.get(cache_key)
+    if arguments is None:
+        docs = action.__doc__
+        with suppress(AttributeError):
+            docs = action.__doc__._generate()
+        arguments = _documented_arguments[cache_key] = frozenset(
+            line.replace(':param ', '').strip().strip(':')
+            for line in docs.splitlines()
+            if line.startswith(':param ')
+        )
+    return arguments
+
+
+@lru_cache()
+def _get_operation_arguments(service_model, operation_name):
+    input_shape = service_model.operation_model(operation_name).input_shape
+    return frozenset(input_shape.members) if input_shape is not None else frozenset()
+
+
+_documented_arguments = {}
 
 
 class _S3Scandir:
+    __slots__ = ('_path',)
+
     def __init__(self, *, path):
         self._path = path
 
@@ -401,56 +583,77 @@ class _S3Scandir:
         return
 
     def __iter__(self):
-        bucket_name = self._path.bucket
-        resource, config = configuration_map.get_configuration(self._path)
-        if not bucket_name:
-            query = _boto3_method_with_parameters(
-                resource.buckets.all,
-                config=config)
-            for bucket in query:
-                yield _S3DirEntry(bucket.name, is_dir=True)
-            return
-        bucket = resource.Bucket(bucket_name)
         sep = self._path._flavour.sep
-
-        kwargs = {
-            'Bucket': bucket.name,
-            'Prefix': _generate_prefix(self._path),
-            'Delimiter': sep}
-
-        continuation_token = None
-        while True:
-            if continuation_token:
-                kwargs['ContinuationToken'] = continuation_token
-            response = _boto3_method_with_parameters(
-                    bucket.meta.client.list_objects_v2,
-                    kwargs=kwargs,
-                    config=config)
-
+        for response in self._pages():
             for folder in response.get('CommonPrefixes', ()):
                 full_name = folder['Prefix'][:-1] if folder['Prefix'].endswith(sep) else folder['Prefix']
-                name = full_name.split(sep)[-1]
+                name = full_name.rpartition(sep)[2]
                 yield _S3DirEntry(name, is_dir=True)
 
             for file in response.get('Contents', ()):
                 if file['Key'] == response['Prefix']:
                     continue
-                name = file['Key'].split(sep)[-1]
+                name = file['Key'].rpartition(sep)[2]
                 yield _S3DirEntry(name=name, is_dir=False, size=file['Size'], last_modified=file['LastModified'])
 
-            if not response.get('IsTruncated'):
-                break
-            continuation_token = response.get('NextContinuationToken')
+    def names(self):
+        """ The entries names, without building the entries """
+        sep = self._path._flavour.sep
+        for response in self._pages():
+            for folder in response.get('CommonPrefixes', ()):
+                full_name = folder['Prefix'][:-1] if folder['Prefix'].endswith(sep) else folder['Prefix']
+                yield full_name.rpartition(sep)[2]
+
+            for file in response.get('Contents', ()):
+                if file['Key'] != response['Prefix']:
+                    yield file['Key'].rpartition(sep)[2]
+
+    def _pages(self):
+        bucket_name = self._path.bucket
+        resource, config = configuration_map.get_configuration(self._path)
+        if not bucket_name:
+            query = _boto3_method_with_parameters(
+                resource.buckets.all,
+                config=config)
+            # The buckets are the "directories" of the root path
+            yield {'Prefix': '', 'CommonPrefixes': [{'Prefix': bucket.name} for bucket in query]}
+            return
+        client = resource.meta.client
+
+        kwargs = _update_kwargs_with_config(
+            client.list_objects_v2,
+            config=config,
+            kwargs={
+                'Bucket': bucket_name,
+                'Prefix': _generate_prefix(self._path),
+                'Delimiter': self._path._flavour.sep,
+                'PaginationConfig': {'PageSize': 1000},
+            })
+
+        paginator = client.get_paginator('list_objects_v2')
+        ttl = configuration_map.get_general_options(self._path)['metadata_cache_ttl']
+        for response in paginator.paginate(**kwargs):
+            if ttl:
+                # The listing already has the stat of the files, save the HeadObject of a following stat
+                for file in response.get('Contents', ()):
+                    stat_result = StatResult(size=file['Size'], last_modified=file['LastModified'])
+                    metadata_cache.set(resource, bucket_name, file['Key'], stat_result, ttl=ttl)
+            yield response
 
 
 class _S3DirEntry:
+    # Listings can yield millions of entries, avoid a __dict__ per entry
+    __slots__ = ('name', '_is_dir', '_size', '_last_modified')
+
     def __init__(self, name, is_dir, size=None, last_modified=None):
         self.name = name
         self._is_dir = is_dir
-        self._stat = StatResult(size=size, last_modified=last_modified)
+        # The StatResult is built only for the entries that are asked for it
+        self._size = size
+        self._last_modified = last_modified
 
     def __repr__(self):
-        return f'{type(self).__name__}(name={self.name}, is_dir={self._is_dir}, stat={self._stat})'
+        return f'{type(self).__name__}(name={self.name}, is_dir={self._is_dir}, stat={self.stat()})'
 
     def inode(self, *args, **kwargs):
         return None
@@ -467,7 +670,7 @@ class _S3DirEntry:
         return False
 
     def stat(self):
-        return self._stat
+        return StatResult(size=self._size, last_modified=self._last_modified)
 
 
 class _S3ConfigurationMap:
@@ -484,9 +687,10 @@ class _S3ConfigurationMap:
 
     @property
     def default_resource(self):
-        return boto3.resource('s3')
+        return boto3.resource('s3', config=_default_client_config())
 
-    def set_configuration(self, path, *, resource=None, arguments=None, glob_new_algorithm=None):
+    def set_configuration(
+            self, path, *, resource=None, arguments=None, glob_new_algorithm=None, metadata_cache_ttl=None):
         self._delayed_setup()
         path_name = str(path)
         if arguments is not None:
@@ -496,38 +700,49 @@ class _S3ConfigurationMap:
         if glob_new_algorithm is not None:
             warn(f'glob_new_algorithm Configuration is Deprecated, '
                  f'in the new version we use only the new algorithm for Globing', category=DeprecationWarning)
-            self.general_options[path_name] = {'glob_new_algorithm': glob_new_algorithm}
+            self.general_options.setdefault(path_name, {})['glob_new_algorithm'] = glob_new_algorithm
+        if metadata_cache_ttl is not None:
+            self.general_options.setdefault(path_name, {})['metadata_cache_ttl'] = metadata_cache_ttl
         self.get_configuration.cache_clear()
+        self.get_general_options.cache_clear()
 
-    @lru_cache()
+    @lru_cache(maxsize=_CONFIGURATION_CACHE_SIZE)
     def get_configuration(self, path):
         self._delayed_setup()
         resources = arguments = None
-        for path in chain([path], path.parents):
-            path_name = str(path)
+        for path_name in _configuration_names(path):
             if resources is None and path_name in self.resources:
                 resources = self.resources[path_name]
             if arguments is None and path_name in self.arguments:
                 arguments = self.arguments[path_name]
+            if resources is not None and arguments is not None:
+                break
         return resources, arguments
 
-    @lru_cache()
+    @lru_cache(maxsize=_CONFIGURATION_CACHE_SIZE)
     def get_general_options(self, path):
         self._delayed_setup()
-        for path in chain([path], path.parents):
-            path_name = str(path)
-            if path_name in self.general_options:
-                return self.general_options[path_name]
-        return
+        general_options = {}
+        for path_name in _configuration_names(path):
+            for name, value in self.general_options.get(path_name, {}).items():
+                general_options.setdefault(name, value)
+        return general_options
 
     def _delayed_setup(self):
         """ Resolves a circular dependency between us and PureS3Path """
+        if self.is_setup:
+            # is_setup is set last, the lock is needed only until the first setup is done
+            return
         with self.setup_lock:
             if not self.is_setup:
                 self.arguments = {'/': {}}
                 self.resources = {'/': self.default_resource}
-                self.general_options = {'/': {'glob_new_algorithm': True}}
+                self.general_options = {'/': {
+                    'glob_new_algorithm': True,
+                    'metadata_cache_ttl': float(os.environ.get('S3PATH_METADATA_CACHE_TTL', 0)),
+                }}
                 self.is_setup = True
 
 
 configuration_map = _S3ConfigurationMap()
+metadata_cache = _MetadataCache()
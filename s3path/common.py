@@ -0,0 +1,200 @@
+"""
+Python version independent helpers of the s3path accessors
+"""
+import os
+from time import monotonic
+from os import stat_result
+from threading import Lock
+from io import UnsupportedOperation
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_EXCEPTION
+from collections import namedtuple, OrderedDict
+
+_NOT_FOUND_ERROR_CODES = frozenset(('404', 'NoSuchKey', 'NoSuchBucket', 'NoSuchVersion', 'NotFound'))
+_ACCESS_DENIED_ERROR_CODES = frozenset(('403', 'AccessDenied'))
+# Number of concurrent S3 requests for operations on many keys (rename / rmdir of a key prefix)
+# The default resource connection pool is sized to match
+_MAX_CONCURRENCY = int(os.environ.get('S3PATH_MAX_CONCURRENCY', 10))
+# DeleteObjects API limit
+_MAX_DELETE_KEYS = 1000
+# Smaller objects are copied with one CopyObject request (boto3 TransferConfig default multipart_threshold)
+_MULTIPART_COPY_THRESHOLD = 8 * 1024 * 1024
+# Bigger objects are read with concurrent ranged GetObject requests of this size
+_RANGED_READ_CHUNK_SIZE = 8 * 1024 * 1024
+# Reads of opened keys are buffered by at least this size (smart_open default is 128 KiB)
+_READ_BUFFER_SIZE = 1024 * 1024
+# Paths whose configuration lookup is cached, the lru_cache default of 128 is
+# smaller than a single listing page of 1000 keys
+_CONFIGURATION_CACHE_SIZE = 4096
+
+
+def _default_client_config():
+    # One resource (and one client) is shared by all the paths and worker threads,
+    # so the connection pool has to be big enough for the concurrent operations
+    from botocore.config import Config
+    # The retry settings are left to the user environment (AWS_MAX_ATTEMPTS, AWS_RETRY_MODE, ~/.aws/config)
+    return Config(max_pool_connections=_MAX_CONCURRENCY)
+
+
+def _single_copy_transfer_config():
+    # The parts of a single object copy can use all the connections of the pool
+    from boto3.s3.transfer import TransferConfig
+    return TransferConfig(max_concurrency=_MAX_CONCURRENCY)
+
+
+def _pooled_copy_transfer_config():
+    # The copies made by the workers of _run_concurrently already use all the connections of the pool
+    from boto3.s3.transfer import TransferConfig
+    return TransferConfig(use_threads=False)
+
+
+def _run_concurrently(function, items):
+    """
+    Call function on every item with a thread pool and return the results in the items order,
+    on the first failure the pending calls are cancelled and the exception is raised
+    """
+    with ThreadPoolExecutor(max_workers=_MAX_CONCURRENCY) as executor:
+        futures = [executor.submit(function, item) for item in items]
+        done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in not_done:
+            future.cancel()
+        for future in done:
+            future.result()
+        return [future.result() for future in futures]
+
+
+def _configuration_names(path):
+    """
+    The names of the path and its parents, nearest first
+    Sliced from the path string, configuration lookups don't build the parent paths
+    """
+    path_name = str(path)
+    yield path_name
+    while '/' in path_name and path_name != '/':
+        path_name = path_name.rpartition('/')[0] or '/'
+        yield path_name
+
+
+_STAT_RESULT_ATTRIBUTES = frozenset(vars(stat_result))
+
+
+class StatResult(namedtuple('BaseStatResult', 'size, last_modified, version_id', defaults=(None,))):
+    """
+    Base of os.stat_result but with boto3 s3 features
+    """
+    __slots__ = ()
+
+    def __getattr__(self, item):
+        if item in _STAT_RESULT_ATTRIBUTES:
+            raise UnsupportedOperation(f'{type(self).__name__} do not support {item} attribute')
+        raise AttributeError(f'{type(self).__name__!r} object has no attribute {item!r}')
+
+    @property
+    def st_size(self) -> int:
+        return self.size
+
+    @property
+    def st_mtime(self) -> float:
+        return self.last_modified.timestamp()
+
+    @property
+    def st_version_id(self) -> str:
+        return self.version_id
+
+
+class _MetadataCache:
+    """
+    Process wide cache of objects StatResult keyed by (endpoint, bucket, key)
+
+    The endpoint is the endpoint url of the resource configured for the path,
+    so paths configured with resources of different S3 services don't share entries.
+    Entries are kept for the metadata_cache_ttl general option of the path (in seconds),
+    the cache is disabled when the ttl is 0 (the default).
+    Entries are dropped when s3path writes, renames or deletes the key (or a prefix of it),
+    changes made by other clients will be visible only after the entry expires.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def __repr__(self):
+        return f'{type(self).__name__}(maxsize={self.maxsize}, size={len(self._entries)})'
+
+    @staticmethod
+    def _endpoint(resource):
+        return resource.meta.client.meta.endpoint_url
+
+    def get(self, resource, bucket, key):
+        if not self._entries:
+            return None
+        cache_key = (self._endpoint(resource), bucket, key)
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None:
+                return None
+            expires_at, stat_result = entry
+            if expires_at <= monotonic():
+                del self._entries[cache_key]
+                return None
+            self._entries.move_to_end(cache_key)
+            return stat_result
+
+    def set(self, resource, bucket, key, stat_result, ttl):
+        if not ttl:
+            return
+        cache_key = (self._endpoint(resource), bucket, key)
+        with self._lock:
+            self._entries[cache_key] = (monotonic() + ttl, stat_result)
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, resource, bucket, prefix=''):
+        """ Drop the entries of every key in the bucket that starts with prefix """
+        endpoint = self._endpoint(resource)
+        with self._lock:
+            for cache_key in [
+                    cache_key for cache_key in self._entries
+                    if cache_key[:2] == (endpoint, bucket) and cache_key[2].startswith(prefix)]:
+                del self._entries[cache_key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class _CloseCallbackWriter:
+    """
+    File object opened for writing that calls on_close once it is closed
+    All the other attributes are the ones of the wrapped file object
+    """
+
+    def __init__(self, file_object, on_close):
+        self._file_object = file_object
+        self._on_close = on_close
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self._file_object!r})'
+
+    def __getattr__(self, name):
+        return getattr(self._file_object, name)
+
+    def __iter__(self):
+        return iter(self._file_object)
+
+    def __enter__(self):
+        self._file_object.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            return self._file_object.__exit__(exc_type, exc_value, traceback)
+        finally:
+            self._on_close()
+
+    def close(self):
+        try:
+            self._file_object.close()
+        finally:
+            self._on_close()
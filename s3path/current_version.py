@@ -6,14 +6,12 @@ import typing
 import fnmatch
 import posixpath
 from datetime import timedelta
-from contextlib import suppress
+from functools import lru_cache
 from urllib.parse import unquote
 from pathlib import PurePath, Path
 from typing import Union, Literal, Optional
 from io import DEFAULT_BUFFER_SIZE, TextIOWrapper
 
-from botocore.exceptions import ClientError
-
 if typing.TYPE_CHECKING:
     import smart_open
     from boto3.resources.factory import ServiceResource
@@ -27,18 +25,20 @@ def register_configuration_parameter(
         *,
         parameters: Optional[dict] = None,
         resource: Optional[ServiceResource] = None,
-        glob_new_algorithm: Optional[bool] = None):
+        glob_new_algorithm: Optional[bool] = None,
+        metadata_cache_ttl: Optional[float] = None):
     if not isinstance(path, PureS3Path):
         raise TypeError(f'path argument have to be a {PurePath} type. got {type(path)}')
     if parameters and not isinstance(parameters, dict):
         raise TypeError(f'parameters argument have to be a dict type. got {type(path)}')
-    if parameters is None and resource is None and glob_new_algorithm is None:
+    if parameters is None and resource is None and glob_new_algorithm is None and metadata_cache_ttl is None:
         raise ValueError('user have to specify parameters or resource arguments')
     accessor.configuration_map.set_configuration(
         path,
         resource=resource,
         arguments=parameters,
-        glob_new_algorithm=glob_new_algorithm)
+        glob_new_algorithm=glob_new_algorithm,
+        metadata_cache_ttl=metadata_cache_ttl)
 
 
 class _S3Parser:
@@ -55,19 +55,13 @@ class PureS3Path(PurePath):
 
     parser = _flavour = _S3Parser()  # _flavour is not relevant after Python version 3.13
 
-    __slots__ = ()
+    # Lazily computed bucket / key cache, paths are immutable
+    __slots__ = ('_bucket', '_key')
 
     def __init__(self, *args):
         super().__init__(*args)
 
-        new_parts = list(self.parts)
-        for part in new_parts[1:]:
-            if part == '..':
-                index = new_parts.index(part)
-                new_parts.pop(index - 1)
-                new_parts.remove(part)
-
-        self._raw_paths = new_parts
+        self._raw_paths = _collapse_parent_parts(self.parts, bool(self.root))
         if sys.version_info >= (3, 13):
             self._drv, self._root, self._tail_cached = self._parse_path(self._raw_path)
         else:
@@ -109,11 +103,11 @@ class PureS3Path(PurePath):
         """
         The AWS S3 Bucket name, or ''
         """
-        self._absolute_path_validation()
-        with suppress(ValueError):
-            _, bucket, *_ = self.parts
-            return bucket
-        return ''
+        try:
+            return self._bucket
+        except AttributeError:
+            self._load_bucket_key()
+            return self._bucket
 
     @property
     def is_bucket(self) -> bool:
@@ -127,9 +121,11 @@ class PureS3Path(PurePath):
         """
         The AWS S3 Key name, or ''
         """
-        self._absolute_path_validation()
-        key = self.parser.sep.join(self.parts[2:])
-        return key
+        try:
+            return self._key
+        except AttributeError:
+            self._load_bucket_key()
+            return self._key
 
     def as_uri(self) -> str:
         """
@@ -142,6 +138,12 @@ class PureS3Path(PurePath):
         if not self.is_absolute():
             raise ValueError('relative path have no bucket, key specification')
 
+    def _load_bucket_key(self):
+        self._absolute_path_validation()
+        parts = self.parts
+        self._bucket = parts[1] if len(parts) > 1 else ''
+        self._key = self.parser.sep.join(parts[2:])
+
 
 class _PathNotSupportedMixin:
     _NOT_SUPPORTED_MESSAGE = '{method} is unsupported on S3 service'
@@ -293,6 +295,15 @@ class S3Path(_PathNotSupportedMixin, PureS3Path, Path):
             return None
         return accessor.stat(self, follow_symlinks=follow_symlinks)
 
+    @classmethod
+    def clear_metadata_cache(cls):
+        """
+        Drop all the cached key metadata, so the next stat / exists / is_file call will query S3
+        Relevant only when the metadata cache is enabled, with the metadata_cache_ttl configuration parameter
+        of register_configuration_parameter or the S3PATH_METADATA_CACHE_TTL environment variable (the default ttl)
+        """
+        accessor.clear_metadata_cache()
+
     def absolute(self) -> S3Path:
         """
         Handle absolute method only if the path is already an absolute one
@@ -309,7 +320,7 @@ class S3Path(_PathNotSupportedMixin, PureS3Path, Path):
         Similarly to boto3's ObjectSummary owner attribute
         """
         self._absolute_path_validation()
-        if not self.is_file():
+        if not self.bucket or not self.key:
             raise KeyError('file not found')
         return accessor.owner(self)
 
@@ -337,6 +348,7 @@ class S3Path(_PathNotSupportedMixin, PureS3Path, Path):
     def rmdir(self):
         """
         Removes this Bucket / key prefix. The Bucket / key prefix must be empty
+        A path that is also a key isn't a directory, NotADirectoryError is raised and no key is deleted
         """
         self._absolute_path_validation()
         if self.is_file():
@@ -362,9 +374,10 @@ class S3Path(_PathNotSupportedMixin, PureS3Path, Path):
         the function succeeds if exist_ok is true (and its modification time is updated to the current time),
         otherwise FileExistsError is raised
         """
-        if self.exists() and not exist_ok:
+        self._absolute_path_validation()
+        if not exist_ok and self.exists():
             raise FileExistsError()
-        self.write_text('')
+        accessor.touch(self)
 
     def mkdir(self, mode: int = 0o777, parents: bool = False, exist_ok: bool = False):
         """
@@ -412,10 +425,7 @@ class S3Path(_PathNotSupportedMixin, PureS3Path, Path):
         self._absolute_path_validation()
         if not self.bucket or not self.key:
             return False
-        try:
-            return bool(self.stat())
-        except ClientError:
-            return False
+        return accessor.is_file(self)
 
     def exists(self) -> bool:
         """
@@ -431,8 +441,10 @@ class S3Path(_PathNotSupportedMixin, PureS3Path, Path):
         When the path points to a Bucket or a key prefix, yield path objects of the directory contents
         """
         self._absolute_path_validation()
-        for name in accessor.listdir(self):
-            yield self / name
+        # Stream the names page by page, a big key prefix isn't held in memory
+        with accessor.scandir(self) as scandir_iter:
+            for name in scandir_iter.names():
+                yield self / name
 
     def open(
             self,
@@ -453,6 +465,14 @@ class S3Path(_PathNotSupportedMixin, PureS3Path, Path):
             errors=errors,
             newline=newline)
 
+    def read_bytes(self) -> bytes:
+        """
+        Returns the content of the Bucket key as bytes,
+        big keys are downloaded with concurrent ranged requests
+        """
+        self._absolute_path_validation()
+        return accessor.read_bytes(self)
+
     def glob(self, pattern: str, *, case_sensitive=None, recurse_symlinks=False):
         """
         Glob the given relative pattern in the Bucket / key prefix represented by this path,
@@ -547,11 +567,13 @@ class S3Path(_PathNotSupportedMixin, PureS3Path, Path):
         self._absolute_path_validation()
         # S3 doesn't care if you remove full prefixes or buckets with its delete API
         # so unless we manually check, this call will be dropped through without any
-        # validation and could result in data loss
+        # validation and could result in data loss.
+        # An existing key is deleted alone even if it is also a prefix of other keys,
+        # the prefix is listed only to tell a directory from a missing key
         try:
-            if self.is_dir():
-                raise IsADirectoryError(str(self))
             if not self.is_file():
+                if self.is_dir():
+                    raise IsADirectoryError(str(self))
                 raise FileNotFoundError(str(self))
         except (IsADirectoryError, FileNotFoundError):
             if missing_ok:
@@ -671,13 +693,53 @@ def _is_wildcard_pattern(pat):
     return "*" in pat or "?" in pat or "[" in pat
 
 
+def _collapse_parent_parts(parts, absolute):
+    # Resolve '..' against the preceding part in a single pass.
+    # The root of an absolute path is never popped, and a leading '..' of a relative path is kept.
+    anchor = 1 if absolute else 0
+    collapsed = list(parts[:anchor])
+    for part in parts[anchor:]:
+        if part != '..':
+            collapsed.append(part)
+        elif len(collapsed) > anchor and collapsed[-1] != '..':
+            collapsed.pop()
+        elif not absolute:
+            collapsed.append(part)
+    return collapsed
+
+
+@lru_cache(maxsize=512)
+def _compile_glob_pattern(path_type, pattern):
+    """ Glob patterns are translated to a regex once, repeated globs reuse it """
+    sep = path_type.parser.sep
+    *_, pattern_parts = path_type._parse_path(pattern)
+
+    new_regex_pattern = ''
+    for part in pattern_parts:
+        if part == sep:
+            continue
+        if '**' in part:
+            new_regex_pattern += f'{sep}*(?s:{part.replace("**", ".*")})'
+            continue
+        if '*' == part:
+            new_regex_pattern += f'{sep}(?s:[^/]+)'
+            continue
+        new_regex_pattern += f'{sep}{fnmatch.translate(part)[:-2]}'
+    new_regex_pattern += r'/*\Z'
+    return re.compile(new_regex_pattern)
+
+
 class _Selector:
     def __init__(self, path, *, pattern):
         self._path = path
         self._prefix, pattern = self._prefix_splitter(pattern)
         self._full_keys = self._calculate_full_or_just_folder(pattern)
         self._target_level = self._calculate_pattern_level(pattern)
-        self.match = self._compile_pattern_parts(self._prefix, pattern, path.bucket)
+        if pattern:
+            self.match = self._compile_pattern_parts(self._prefix, pattern, path.bucket)
+        else:
+            # A pattern without wildcards names a single path, compare strings instead of running a regex
+            self.match = self._literal_target(self._prefix, path.bucket).__eq__
 
     def select(self):
         for target in self._deep_cached_dir_scan():
@@ -725,21 +787,27 @@ class _Selector:
 
     def _deep_cached_dir_scan(self):
         cache = set()
-        prefix_sep_count = self._prefix.count(self._path.parser.sep)
+        # Called for every listed key, keep the loop on locals
+        sep = self._path.parser.sep
+        target_level = self._target_level
+        prefix_sep_count = self._prefix.count(sep)
         for key in accessor.iter_keys(self._path, prefix=self._prefix, full_keys=self._full_keys):
-            key_sep_count = key.count(self._path.parser.sep) + 1
-            key_parts = key.rsplit(self._path.parser.sep, maxsplit=key_sep_count - prefix_sep_count)
-            target_path_parts = key_parts[:self._target_level]
+            key_parts = key.rsplit(sep, maxsplit=key.count(sep) + 1 - prefix_sep_count)
             target_path = ''
-            for part in target_path_parts:
+            for part in key_parts[:target_level]:
                 if not part:
                     continue
-                target_path += f'{self._path.parser.sep}{part}'
+                target_path += sep + part
                 if target_path in cache:
                     continue
                 yield target_path
                 cache.add(target_path)
 
+    def _literal_target(self, prefix, bucket):
+        sep = self._path.parser.sep
+        *_, parts = self._path._parse_path(sep.join(('', bucket, prefix)))
+        return ''.join(f'{sep}{part}' for part in parts if part != sep)
+
     def _compile_pattern_parts(self, prefix, pattern, bucket):
         pattern = self._path.parser.sep.join((
             '',
@@ -747,18 +815,4 @@ class _Selector:
             prefix,
             pattern,
         ))
-        *_, pattern_parts = self._path._parse_path(pattern)
-
-        new_regex_pattern = ''
-        for part in pattern_parts:
-            if part == self._path.parser.sep:
-                continue
-            if '**' in part:
-                new_regex_pattern += f'{self._path.parser.sep}*(?s:{part.replace("**", ".*")})'
-                continue
-            if '*' == part:
-                new_regex_pattern += f'{self._path.parser.sep}(?s:[^/]+)'
-                continue
-            new_regex_pattern += f'{self._path.parser.sep}{fnmatch.translate(part)[:-2]}'
-        new_regex_pattern += r'/*\Z'
-        return re.compile(new_regex_pattern).fullmatch
+        return _compile_glob_pattern(type(self._path), pattern).fullmatch
@@ -3,19 +3,18 @@ s3path provides a Pythonic API to S3 by wrapping boto3 with pathlib interface
 """
 from __future__ import annotations
 
+import os
 import re
 import sys
 import fnmatch
-from os import stat_result
 from threading import Lock
-from itertools import chain
+from itertools import chain, islice
 from datetime import timedelta
-from functools import lru_cache
-from contextlib import suppress
+from functools import lru_cache, partial
 from urllib.parse import unquote
-from collections import namedtuple, deque
+from collections import deque
 from typing import Union, Generator, Literal, Optional
-from io import DEFAULT_BUFFER_SIZE, UnsupportedOperation, TextIOWrapper
+from io import DEFAULT_BUFFER_SIZE, TextIOWrapper
 
 from pathlib import _PosixFlavour, _is_wildcard_pattern, PurePath, Path
 
@@ -27,6 +26,24 @@ from botocore.docs.docstring import LazyLoadedDocstring
 import smart_open
 import smart_open.s3
 
+from .common import (
+    _NOT_FOUND_ERROR_CODES,
+    _ACCESS_DENIED_ERROR_CODES,
+    _MAX_DELETE_KEYS,
+    _MULTIPART_COPY_THRESHOLD,
+    _RANGED_READ_CHUNK_SIZE,
+    _READ_BUFFER_SIZE,
+    _CONFIGURATION_CACHE_SIZE,
+    _default_client_config,
+    _single_copy_transfer_config,
+    _pooled_copy_transfer_config,
+    _run_concurrently,
+    _configuration_names,
+    StatResult,
+    _MetadataCache,
+    _CloseCallbackWriter,
+)
+
 
 __all__ = (
     'register_configuration_parameter',
@@ -37,7 +54,22 @@ __all__ = (
     'StatResult',
 )
 
-ALLOWED_COPY_ARGS = TransferManager.ALLOWED_COPY_ARGS
+ALLOWED_COPY_ARGS = frozenset(TransferManager.ALLOWED_COPY_ARGS)
+
+
+def _collapse_parent_parts(parts, absolute):
+    # Resolve '..' against the preceding part in a single pass.
+    # The root of an absolute path is never popped, and a leading '..' of a relative path is kept.
+    anchor = 1 if absolute else 0
+    collapsed = list(parts[:anchor])
+    for part in parts[anchor:]:
+        if part != '..':
+            collapsed.append(part)
+        elif len(collapsed) > anchor and collapsed[-1] != '..':
+            collapsed.pop()
+        elif not absolute:
+            collapsed.append(part)
+    return collapsed
 
 
 class _S3Flavour(_PosixFlavour):
@@ -45,12 +77,7 @@ class _S3Flavour(_PosixFlavour):
 
     def parse_parts(self, parts):
         drv, root, parsed = super().parse_parts(parts)
-        for part in parsed[1:]:
-            if part == '..':
-                index = parsed.index(part)
-                parsed.pop(index - 1)
-                parsed.remove(part)
-        return drv, root, parsed
+        return drv, root, _collapse_parent_parts(parsed, bool(root))
 
     def make_uri(self, path):
         uri = super().make_uri(path)
@@ -64,6 +91,11 @@ class _S3Flavour(_PosixFlavour):
             pattern,
         ))
 
+        return self._compile_pattern(pattern).fullmatch
+
+    @lru_cache(maxsize=512)
+    def _compile_pattern(self, pattern):
+        """ Glob patterns are translated to a regex once, repeated globs reuse it """
         *_, pattern_parts = self.parse_parts((pattern,))
         new_regex_pattern = ''
         for part in pattern_parts:
@@ -73,11 +105,11 @@ class _S3Flavour(_PosixFlavour):
                 new_regex_pattern += f'{self.sep}*(?s:{part.replace("**", ".*")})'
                 continue
             if '*' == part:
-                new_regex_pattern += f'{path._flavour.sep}(?s:[^/]+)'
+                new_regex_pattern += f'{self.sep}(?s:[^/]+)'
                 continue
             new_regex_pattern += f'{self.sep}{fnmatch.translate(part)[:-2]}'
         new_regex_pattern += r'/*\Z'
-        return re.compile(new_regex_pattern).fullmatch
+        return re.compile(new_regex_pattern)
 
 
 class _S3ConfigurationMap:
@@ -96,48 +128,64 @@ class _S3ConfigurationMap:
 
     def _delayed_setup(self):
         """ Resolves a circular dependency between us and PureS3Path """
+        if self.is_setup:
+            # is_setup is set last, the lock is needed only until the first setup is done
+            return
         with self.setup_lock:
             if not self.is_setup:
-                self.arguments = {PureS3Path('/'): self.default_arguments}
-                self.resources = {PureS3Path('/'): self.default_resource}
-                self.general_options = {PureS3Path('/'): {'glob_new_algorithm': True}}
+                self.arguments = {'/': self.default_arguments}
+                self.resources = {'/': self.default_resource}
+                self.general_options = {'/': {
+                    'glob_new_algorithm': True,
+                    'metadata_cache_ttl': float(os.environ.get('S3PATH_METADATA_CACHE_TTL', 0)),
+                }}
                 self.is_setup = True
 
     def __repr__(self):
         return f'{type(self).__name__}' \
                f'(arguments={self.arguments}, resources={self.resources}, is_setup={self.is_setup})'
 
-    def set_configuration(self, path, *, resource=None, arguments=None, glob_new_algorithm=None):
+    def set_configuration(
+            self, path, *, resource=None, arguments=None, glob_new_algorithm=None, metadata_cache_ttl=None):
         self._delayed_setup()
+        path_name = str(path)
         if arguments is not None:
-            self.arguments[path] = arguments
+            self.arguments[path_name] = arguments
         if resource is not None:
-            self.resources[path] = resource
+            self.resources[path_name] = resource
         if glob_new_algorithm is not None:
-            self.general_options[path] = {'glob_new_algorithm': glob_new_algorithm}
+            self.general_options.setdefault(path_name, {})['glob_new_algorithm'] = glob_new_algorithm
+        if metadata_cache_ttl is not None:
+            self.general_options.setdefault(path_name, {})['metadata_cache_ttl'] = metadata_cache_ttl
         self.get_configuration.cache_clear()
+        self.get_general_options.cache_clear()
 
-    @lru_cache()
+    @lru_cache(maxsize=_CONFIGURATION_CACHE_SIZE)
     def get_configuration(self, path):
         self._delayed_setup()
         resources = arguments = None
-        for path in chain([path], path.parents):
-            if resources is None and path in self.resources:
-                resources = self.resources[path]
-            if arguments is None and path in self.arguments:
-                arguments = self.arguments[path]
+        for path_name in _configuration_names(path):
+            if resources is None and path_name in self.resources:
+                resources = self.resources[path_name]
+            if arguments is None and path_name in self.arguments:
+                arguments = self.arguments[path_name]
+            if resources is not None and arguments is not None:
+                break
         return resources, arguments
 
-    @lru_cache()
+    @lru_cache(maxsize=_CONFIGURATION_CACHE_SIZE)
     def get_general_options(self, path):
         self._delayed_setup()
-        for path in chain([path], path.parents):
-            if path in self.general_options:
-                return self.general_options[path]
-        return
+        general_options = {}
+        for path_name in _configuration_names(path):
+            for name, value in self.general_options.get(path_name, {}).items():
+                general_options.setdefault(name, value)
+        return general_options
 
 
 class _S3Scandir:
+    __slots__ = ('_s3_accessor', '_path')
+
     def __init__(self, *, s3_accessor, path):
         self._s3_accessor = s3_accessor
         self._path = path
@@ -149,37 +197,50 @@ class _S3Scandir:
         return
 
     def __iter__(self) -> Generator[_S3DirEntry, None, None]:
-        bucket_name = self._path.bucket
-        resource, _ = self._s3_accessor.configuration_map.get_configuration(self._path)
-        if not bucket_name:
-            for bucket in resource.buckets.all():
-                yield _S3DirEntry(bucket.name, is_dir=True)
-            return
-        bucket = resource.Bucket(bucket_name)
         sep = self._path._flavour.sep
-
-        kwargs = {
-            'Bucket': bucket.name,
-            'Prefix': self._s3_accessor.generate_prefix(self._path),
-            'Delimiter': sep}
-
-        continuation_token = None
-        while True:
-            if continuation_token:
-                kwargs['ContinuationToken'] = continuation_token
-            response = bucket.meta.client.list_objects_v2(**kwargs)
+        for response in self._pages():
             for folder in response.get('CommonPrefixes', ()):
                 full_name = folder['Prefix'][:-1] if folder['Prefix'].endswith(sep) else folder['Prefix']
-                name = full_name.split(sep)[-1]
+                name = full_name.rpartition(sep)[2]
                 yield _S3DirEntry(name, is_dir=True)
             for file in response.get('Contents', ()):
                 if file['Key'] == response['Prefix']:
                     continue
-                name = file['Key'].split(sep)[-1]
+                name = file['Key'].rpartition(sep)[2]
                 yield _S3DirEntry(name=name, is_dir=False, size=file['Size'], last_modified=file['LastModified'])
-            if not response.get('IsTruncated'):
-                break
-            continuation_token = response.get('NextContinuationToken')
+
+    def names(self) -> Generator[str, None, None]:
+        """ The entries names, without building the entries """
+        sep = self._path._flavour.sep
+        for response in self._pages():
+            for folder in response.get('CommonPrefixes', ()):
+                full_name = folder['Prefix'][:-1] if folder['Prefix'].endswith(sep) else folder['Prefix']
+                yield full_name.rpartition(sep)[2]
+            for file in response.get('Contents', ()):
+                if file['Key'] != response['Prefix']:
+                    yield file['Key'].rpartition(sep)[2]
+
+    def _pages(self):
+        bucket_name = self._path.bucket
+        resource, _ = self._s3_accessor.configuration_map.get_configuration(self._path)
+        if not bucket_name:
+            # The buckets are the "directories" of the root path
+            yield {'Prefix': '', 'CommonPrefixes': [{'Prefix': bucket.name} for bucket in resource.buckets.all()]}
+            return
+
+        paginator = resource.meta.client.get_paginator('list_objects_v2')
+        ttl = self._s3_accessor.configuration_map.get_general_options(self._path)['metadata_cache_ttl']
+        for response in paginator.paginate(
+                Bucket=bucket_name,
+                Prefix=self._s3_accessor.generate_prefix(self._path),
+                Delimiter=self._path._flavour.sep,
+                PaginationConfig={'PageSize': 1000}):
+            if ttl:
+                # The listing already has the stat of the files, save the HeadObject of a following stat
+                for file in response.get('Contents', ()):
+                    stat_result = StatResult(size=file['Size'], last_modified=file['LastModified'])
+                    self._s3_accessor.metadata_cache.set(resource, bucket_name, file['Key'], stat_result, ttl=ttl)
+            yield response
 
 
 class _S3Accessor:
@@ -189,27 +250,59 @@ class _S3Accessor:
 
     In this case this will access AWS S3 service
     """
+    metadata_cache = _MetadataCache()
+    _documented_arguments = {}
 
     def __init__(self, **kwargs):
+        kwargs.setdefault('config', _default_client_config())
         self.configuration_map = _S3ConfigurationMap(default_resource_kwargs=kwargs)
 
     def stat(self, path, *, follow_symlinks=True):
         if not follow_symlinks:
             raise NotImplementedError(
                 f'Setting follow_symlinks to {follow_symlinks} is unsupported on S3 service.')
-        resource, _ = self.configuration_map.get_configuration(path)
-        object_summary = resource.ObjectSummary(path.bucket, path.key)
-        return StatResult(
-            size=object_summary.size,
-            last_modified=object_summary.last_modified,
+        return self._head(path)
+
+    def is_file(self, path):
+        try:
+            self.stat(path)
+        except ClientError as client_error:
+            if client_error.response.get('Error', {}).get('Code') in _NOT_FOUND_ERROR_CODES:
+                return False
+            raise
+        return True
+
+    def _head(self, path):
+        bucket_name = path.bucket
+        key_name = path.key
+        resource, config = self.configuration_map.get_configuration(path)
+        stat_result = self.metadata_cache.get(resource, bucket_name, key_name)
+        if stat_result is not None:
+            return stat_result
+        response = self._boto3_method_with_parameters(
+            resource.meta.client.head_object,
+            config=config,
+            kwargs={'Bucket': bucket_name, 'Key': key_name},
         )
+        stat_result = StatResult(
+            size=response['ContentLength'],
+            last_modified=response['LastModified'],
+        )
+        general_options = self.configuration_map.get_general_options(path)
+        self.metadata_cache.set(resource, bucket_name, key_name, stat_result, ttl=general_options['metadata_cache_ttl'])
+        return stat_result
 
     def is_dir(self, path):
         if str(path) == path.root:
             return True
-        resource, _ = self.configuration_map.get_configuration(path)
-        bucket = resource.Bucket(path.bucket)
-        return any(bucket.objects.filter(Prefix=self.generate_prefix(path)))
+        resource, config = self.configuration_map.get_configuration(path)
+        # One key is enough to prove that the prefix isn't empty
+        response = self._boto3_method_with_parameters(
+            resource.meta.client.list_objects_v2,
+            config=config,
+            kwargs={'Bucket': path.bucket, 'Prefix': self.generate_prefix(path), 'MaxKeys': 1},
+        )
+        return response.get('KeyCount', 0) > 0
 
     def exists(self, path):
         bucket_name = path.bucket
@@ -226,24 +319,40 @@ class _S3Accessor:
                     # Not found
                     return False
                 raise e
-        bucket = resource.Bucket(bucket_name)
-        key_name = str(path.key)
-        for object in bucket.objects.filter(Prefix=key_name):
-            if object.key == key_name:
+        # A HeadObject answers for keys, a one key listing is needed only for key prefixes
+        try:
+            if self.is_file(path):
                 return True
-            if object.key.startswith(key_name + path._flavour.sep):
+        except ClientError as client_error:
+            if client_error.response.get('Error', {}).get('Code') not in _ACCESS_DENIED_ERROR_CODES:
+                raise
+            # HeadObject requires s3:GetObject, credentials that can only list the bucket look for the key itself
+            if self._is_listed_key(path):
                 return True
-        return False
+        return self.is_dir(path)
+
+    def _is_listed_key(self, path):
+        resource, config = self.configuration_map.get_configuration(path)
+        # The key itself is listed before any other key it prefixes
+        response = self._boto3_method_with_parameters(
+            resource.meta.client.list_objects_v2,
+            config=config,
+            kwargs={'Bucket': path.bucket, 'Prefix': path.key, 'MaxKeys': 1},
+        )
+        contents = response.get('Contents')
+        return bool(contents) and contents[0]['Key'] == path.key
 
     def scandir(self, path) -> _S3Scandir:
         return _S3Scandir(s3_accessor=self, path=path)
 
     def listdir(self, path):
         with self.scandir(path) as scandir_iter:
-            return [entry.name for entry in scandir_iter]
+            return list(scandir_iter.names())
 
     def open(self, path, *, mode='r', buffering=-1, encoding=None, errors=None, newline=None):
         resource, config = self.configuration_map.get_configuration(path)
+        if 'r' not in mode:
+            self.metadata_cache.invalidate(resource, path.bucket, path.key)
 
         smart_open_kwargs = {
             'uri': "s3:/" + str(path),
@@ -253,73 +362,105 @@ class _S3Accessor:
             'errors': errors,
             'newline': newline,
         }
-        transport_params = {'defer_seek': True}
-        dummy_object = resource.Object('bucket', 'key')
-        if smart_open.__version__ >= '5.1.0':
-            self._smart_open_new_version_kwargs(
-                dummy_object,
-                resource,
-                config,
-                transport_params,
-                smart_open_kwargs)
-        else:
-            self._smart_open_old_version_kwargs(
-                dummy_object,
-                resource,
-                config,
-                transport_params,
-                smart_open_kwargs)
+        # smart_open doesn't use buffering for S3 keys, the reader fills its buffer by buffer_size
+        transport_params = {'defer_seek': True, 'buffer_size': max(buffering, _READ_BUFFER_SIZE)}
+        self._smart_open_kwargs(resource, config, transport_params, smart_open_kwargs)
 
         file_object = smart_open.open(**smart_open_kwargs)
+        if 'r' not in mode and self.configuration_map.get_general_options(path)['metadata_cache_ttl']:
+            # The key is replaced only when the writer is closed, a stat made while it was open cached the old key
+            file_object = _CloseCallbackWriter(
+                file_object, partial(self.metadata_cache.invalidate, resource, path.bucket, path.key))
         return file_object
 
     def owner(self, path):
         bucket_name = path.bucket
         key_name = path.key
         resource, _ = self.configuration_map.get_configuration(path)
-        object_summary = resource.ObjectSummary(bucket_name, key_name)
         # return object_summary.owner['DisplayName']
         # This is a hack till boto3 resolve this issue:
         # https://github.com/boto/boto3/issues/1950
-        responce = object_summary.meta.client.list_objects_v2(
-            Bucket=object_summary.bucket_name,
-            Prefix=object_summary.key,
-            FetchOwner=True)
-        return responce['Contents'][0]['Owner']['DisplayName']
+        # The key itself is listed before any other key it prefixes,
+        # so the listing also tells if the key exists
+        response = resource.meta.client.list_objects_v2(
+            Bucket=bucket_name,
+            Prefix=key_name,
+            FetchOwner=True,
+            MaxKeys=1)
+        contents = response.get('Contents')
+        if not contents or contents[0]['Key'] != key_name:
+            raise KeyError('file not found')
+        return contents[0]['Owner']['DisplayName']
 
     def rename(self, path, target):
         source_bucket_name = path.bucket
         source_key_name = path.key
         target_bucket_name = target.bucket
         target_key_name = target.key
-
         resource, config = self.configuration_map.get_configuration(path)
+        target_resource, target_config = self.configuration_map.get_configuration(target)
+        self.metadata_cache.invalidate(resource, source_bucket_name, source_key_name)
+        self.metadata_cache.invalidate(target_resource, target_bucket_name, target_key_name)
 
-        if not self.is_dir(path):
-            target_bucket = resource.Bucket(target_bucket_name)
-            object_summary = resource.ObjectSummary(source_bucket_name, source_key_name)
-            old_source = {'Bucket': object_summary.bucket_name, 'Key': object_summary.key}
+        # Boto3 resources aren't thread safe, the workers use only the client
+        client = resource.meta.client
+
+        def copy_key():
+            old_source = {'Bucket': source_bucket_name, 'Key': source_key_name}
             self._boto3_method_with_extraargs(
-                target_bucket.copy,
+                client.copy,
                 config=config,
-                args=(old_source, target_key_name),
+                args=(old_source, target_bucket_name, target_key_name),
+                kwargs={'Config': _single_copy_transfer_config()},
                 allowed_extra_args=ALLOWED_COPY_ARGS,
             )
-            self._boto3_method_with_parameters(object_summary.delete)
+
+        if not self.is_dir(path):
+            copy_key()
+            self._boto3_method_with_parameters(
+                client.delete_object,
+                config=config,
+                kwargs={'Bucket': source_bucket_name, 'Key': source_key_name},
+            )
             return
-        bucket = resource.Bucket(source_bucket_name)
-        target_bucket = resource.Bucket(target_bucket_name)
-        for object_summary in bucket.objects.filter(Prefix=source_key_name):
-            old_source = {'Bucket': object_summary.bucket_name, 'Key': object_summary.key}
-            new_key = object_summary.key.replace(source_key_name, target_key_name)
-            _, config = self.configuration_map.get_configuration(S3Path(target_bucket_name, new_key))
+        source_prefix = self.generate_prefix(path)
+        target_prefix = self.generate_prefix(target)
+        transfer_config = _pooled_copy_transfer_config()
+
+        def copy(object_info):
+            key_name = object_info['Key']
+            old_source = {'Bucket': source_bucket_name, 'Key': key_name}
+            new_key = target_prefix + key_name[len(source_prefix):]
+            if object_info['Size'] < _MULTIPART_COPY_THRESHOLD:
+                # The managed copy would send a HeadObject and set up a transfer for each key
+                self._boto3_method_with_parameters(
+                    client.copy_object,
+                    config=target_config,
+                    kwargs={'CopySource': old_source, 'Bucket': target_bucket_name, 'Key': new_key},
+                )
+                return
             self._boto3_method_with_extraargs(
-                target_bucket.copy,
-                config=config,
-                args=(old_source, new_key),
+                client.copy,
+                config=target_config,
+                args=(old_source, target_bucket_name, new_key),
+                kwargs={'Config': transfer_config},
                 allowed_extra_args=ALLOWED_COPY_ARGS,
             )
-            self._boto3_method_with_parameters(object_summary.delete)
+
+        source_keys = []
+        # The key prefix doesn't list a key named like the path itself, it is moved along with the keys it prefixes
+        if source_key_name and self.is_file(path):
+            copy_key()
+            source_keys.append(source_key_name)
+
+        # The keys are copied one listing page at a time, only their names are kept for the delete
+        objects = self._list_objects(client, source_bucket_name, source_prefix, config=config)
+        batch = list(islice(objects, _MAX_DELETE_KEYS))
+        while batch:
+            _run_concurrently(copy, batch)
+            source_keys.extend(object_info['Key'] for object_info in batch)
+            batch = list(islice(objects, _MAX_DELETE_KEYS))
+        self._delete_keys(client, source_bucket_name, source_keys, config=config)
 
     def replace(self, path, target):
         return self.rename(path, target)
@@ -328,11 +469,27 @@ class _S3Accessor:
         bucket_name = path.bucket
         key_name = path.key
         resource, config = self.configuration_map.get_configuration(path)
-        bucket = resource.Bucket(bucket_name)
-        for object_summary in bucket.objects.filter(Prefix=key_name):
-            self._boto3_method_with_parameters(object_summary.delete, config=config)
+        self.metadata_cache.invalidate(resource, bucket_name, key_name)
+        client = resource.meta.client
+        # Only the keys under key + '/' are deleted, a key named like the path itself is left alone
+        self._delete_keys(
+            client,
+            bucket_name,
+            (object_info['Key'] for object_info in self._list_objects(
+                client, bucket_name, self.generate_prefix(path), config=config)),
+            config=config,
+        )
         if path.is_bucket:
-            self._boto3_method_with_parameters(bucket.delete, config=config)
+            self._boto3_method_with_parameters(resource.Bucket(bucket_name).delete, config=config)
+
+    def touch(self, path):
+        resource, config = self.configuration_map.get_configuration(path)
+        self.metadata_cache.invalidate(resource, path.bucket, path.key)
+        self._boto3_method_with_parameters(
+            resource.meta.client.put_object,
+            config=config,
+            kwargs={'Bucket': path.bucket, 'Key': path.key, 'Body': b''},
+        )
 
     def mkdir(self, path, mode):
         resource, config = self.configuration_map.get_configuration(path)
@@ -343,28 +500,64 @@ class _S3Accessor:
         )
 
     def generate_prefix(self, path):
-        sep = path._flavour.sep
-        if not path.key:
-            return ''
+        # Keys are normalized like posix paths, they never end with the separator
         key_name = path.key
-        if not key_name.endswith(sep):
-            return key_name + sep
-        return key_name
+        return key_name + '/' if key_name else ''
 
     def unlink(self, path, *args, **kwargs):
         bucket_name = path.bucket
         key_name = path.key
         resource, config = self.configuration_map.get_configuration(path)
-        bucket = resource.Bucket(bucket_name)
+        self.metadata_cache.invalidate(resource, bucket_name, key_name)
         try:
             self._boto3_method_with_parameters(
-                bucket.meta.client.delete_object,
+                resource.meta.client.delete_object,
                 config=config,
                 kwargs={"Bucket": bucket_name, "Key": key_name}
             )
         except ClientError:
             raise OSError(f'/{bucket_name}/{key_name}')
 
+    def read_bytes(self, path):
+        resource, config = self.configuration_map.get_configuration(path)
+        client = resource.meta.client
+        kwargs = {'Bucket': path.bucket, 'Key': path.key}
+        version_id = getattr(path, 'version_id', None)
+        if version_id:
+            kwargs['VersionId'] = version_id
+
+        def get_range(start, **extra_kwargs):
+            end = start + _RANGED_READ_CHUNK_SIZE - 1
+            return self._boto3_method_with_parameters(
+                client.get_object,
+                config=config,
+                kwargs={**kwargs, **extra_kwargs, 'Range': f'bytes={start}-{end}'},
+            )
+
+        # The first range tells the object size, small objects are read with this single request
+        try:
+            response = get_range(0)
+        except ClientError as client_error:
+            if client_error.response.get('Error', {}).get('Code') != 'InvalidRange':
+                raise
+            # Empty objects have no satisfiable range
+            response = self._boto3_method_with_parameters(client.get_object, config=config, kwargs=kwargs)
+            return response['Body'].read()
+        if 'ContentRange' not in response:
+            # Servers may ignore the range and send the whole object (RFC 7233)
+            return response['Body'].read()
+        size = int(response['ContentRange'].rpartition('/')[2])
+        etag = response['ETag']
+
+        def read_range(start):
+            # IfMatch fails the read if the object is replaced in the middle
+            return get_range(start, IfMatch=etag)['Body'].read()
+
+        chunks = [response['Body'].read()]
+        chunks.extend(_run_concurrently(
+            read_range, range(_RANGED_READ_CHUNK_SIZE, size, _RANGED_READ_CHUNK_SIZE)))
+        return b''.join(chunks)
+
     def get_presigned_url(self,path,  expire_in: int) -> str:
         resource, config = self.configuration_map.get_configuration(path)
         return self._boto3_method_with_parameters(
@@ -382,18 +575,12 @@ class _S3Accessor:
         bucket_name = path.bucket
 
         def get_keys():
-            continuation_token = None
-            while True:
-                if continuation_token:
-                    kwargs['ContinuationToken'] = continuation_token
-                response = resource.meta.client.list_objects_v2(**kwargs)
+            paginator = resource.meta.client.get_paginator('list_objects_v2')
+            for response in paginator.paginate(**kwargs, PaginationConfig={'PageSize': 1000}):
                 for file in response.get('Contents', ()):
                     yield file['Key']
                 for folder in response.get('CommonPrefixes', ()):
                     yield folder['Prefix']
-                if not response.get('IsTruncated'):
-                    break
-                continuation_token = response.get('NextContinuationToken')
 
         # get buckets
         if not bucket_name and not full_keys:
@@ -414,27 +601,75 @@ class _S3Accessor:
             kwargs['Delimiter'] = path._flavour.sep
         yield from get_keys()
 
+    def _list_objects(self, client, bucket_name, prefix, config=None):
+        """ Yield the ListObjectsV2 info of all the keys that start with prefix, one page at a time """
+        kwargs = self._update_kwargs_with_config(
+            client.list_objects_v2,
+            config=config,
+            kwargs={'Bucket': bucket_name, 'Prefix': prefix, 'PaginationConfig': {'PageSize': 1000}},
+        )
+        for response in client.get_paginator('list_objects_v2').paginate(**kwargs):
+            yield from response.get('Contents', ())
+
+    def _delete_keys(self, client, bucket_name, keys, config=None):
+        """ Delete the keys with DeleteObjects requests of up to 1000 keys """
+        keys = iter(keys)
+        batch = list(islice(keys, _MAX_DELETE_KEYS))
+        while batch:
+            response = self._boto3_method_with_parameters(
+                client.delete_objects,
+                config=config,
+                kwargs={
+                    'Bucket': bucket_name,
+                    'Delete': {'Objects': [{'Key': key} for key in batch], 'Quiet': True},
+                },
+            )
+            errors = response.get('Errors')
+            if errors:
+                error = errors[0]
+                raise OSError(
+                    f'failed to delete {len(errors)} keys, '
+                    f'/{bucket_name}/{error["Key"]}: {error["Code"]} {error["Message"]}')
+            batch = list(islice(keys, _MAX_DELETE_KEYS))
+
     def _update_kwargs_with_config(self, boto3_method, config, kwargs=None):
         kwargs = kwargs or {}
-        if config is not None:
+        if config:
+            action_arguments = self._get_action_arguments(boto3_method)
             kwargs.update({
                 key: value
                 for key, value in config.items()
-                if key in self._get_action_arguments(boto3_method)
+                if key in action_arguments
             })
         return kwargs
 
-    @lru_cache()
     def _get_action_arguments(self, action):
-        if isinstance(action.__doc__, LazyLoadedDocstring):
-            docs = action.__doc__._generate()
-        else:
-            docs = action.__doc__
-        return set(
-            line.replace(':param ', '').strip().strip(':')
-            for line in docs.splitlines()
-            if line.startswith(':param ')
-        )
+        owner = getattr(action, '__self__', None)
+        client_meta = getattr(owner, 'meta', None)
+        operation_name = getattr(client_meta, 'method_to_api_mapping', {}).get(action.__name__)
+        if operation_name is not None:
+            # Client operations, read the already parsed botocore model
+            return self._get_operation_arguments(client_meta.service_model, operation_name)
+        # Resource actions are created for every resource object (with a new class),
+        # so their documented parameters are cached by name
+        cache_key = (type(owner).__qualname__, action.__name__) if owner is not None else action
+        arguments = self._documented_arguments.get(cache_key)
+        if arguments is None:
+            if isinstance(action.__doc__, LazyLoadedDocstring):
+                docs = action.__doc__._generate()
+            else:
+                docs = action.__doc__
+            arguments = self._documented_arguments[cache_key] = frozenset(
+                line.replace(':param ', '').strip().strip(':')
+                for line in docs.splitlines()
+                if line.startswith(':param ')
+            )
+        return arguments
+
+    @lru_cache()
+    def _get_operation_arguments(self, service_model, operation_name):
+        input_shape = service_model.operation_model(operation_name).input_shape
+        return frozenset(input_shape.members) if input_shape is not None else frozenset()
 
     def _boto3_method_with_parameters(self, boto3_method, config=None, args=(), kwargs=None):
         kwargs = self._update_kwargs_with_config(boto3_method, config, kwargs)
@@ -459,23 +694,22 @@ class _S3Accessor:
         kwargs["ExtraArgs"] = extra_args
         return boto3_method(*args, **kwargs)
 
-    def _smart_open_new_version_kwargs(
+    def _smart_open_kwargs(
             self,
-            dummy_object,
             resource,
             config,
             transport_params,
             smart_open_kwargs):
         """
-        New Smart-Open api
+        Smart-Open api (smart_open>=5.1.0 is required), the requests are sent with our client
         Doc: https://github.com/RaRe-Technologies/smart_open/blob/develop/MIGRATING_FROM_OLDER_VERSIONS.rst
         """
-        get_object_kwargs = self._update_kwargs_with_config(
-            dummy_object.meta.client.get_object, config=config)
+        client = resource.meta.client
+        get_object_kwargs = self._update_kwargs_with_config(client.get_object, config=config)
         create_multipart_upload_kwargs = self._update_kwargs_with_config(
-            dummy_object.meta.client.create_multipart_upload, config=config)
+            client.create_multipart_upload, config=config)
         transport_params.update(
-            client=resource.meta.client,
+            client=client,
             client_kwargs={
                 'S3.Client.create_multipart_upload': create_multipart_upload_kwargs,
                 'S3.Client.get_object': get_object_kwargs
@@ -486,53 +720,6 @@ class _S3Accessor:
             transport_params=transport_params,
         )
 
-    def _smart_open_old_version_kwargs(
-            self,
-            dummy_object,
-            resource,
-            config,
-            transport_params,
-            smart_open_kwargs):
-        """
-        Old Smart-Open api
-        <5.0.0
-        """
-        def get_resource_kwargs():
-            # This is a good example of the complicity of boto3 and botocore
-            # resource arguments from the resource object :-/
-            # very annoying...
-
-            try:
-                access_key = resource.meta.client._request_signer._credentials.access_key
-                secret_key = resource.meta.client._request_signer._credentials.secret_key
-                token = resource.meta.client._request_signer._credentials.token
-            except AttributeError:
-                access_key = secret_key = token = None
-            return {
-                'endpoint_url': resource.meta.client.meta._endpoint_url,
-                'config': resource.meta.client._client_config,
-                'region_name': resource.meta.client._client_config.region_name,
-                'use_ssl': resource.meta.client._endpoint.host.startswith('https'),
-                'verify': resource.meta.client._endpoint.http_session._verify,
-                'aws_access_key_id': access_key,
-                'aws_secret_access_key': secret_key,
-                'aws_session_token': token,
-            }
-
-        initiate_multipart_upload_kwargs = self._update_kwargs_with_config(
-            dummy_object.initiate_multipart_upload, config=config)
-        object_kwargs = self._update_kwargs_with_config(dummy_object.get, config=config)
-        transport_params.update(
-            multipart_upload_kwargs=initiate_multipart_upload_kwargs,
-            object_kwargs=object_kwargs,
-            resource_kwargs=get_resource_kwargs(),
-            session=boto3.DEFAULT_SESSION,
-        )
-        smart_open_kwargs.update(
-            ignore_ext=True,
-            transport_params=transport_params,
-        )
-
 
 class _VersionedS3Accessor(_S3Accessor):
 
@@ -540,30 +727,41 @@ class _VersionedS3Accessor(_S3Accessor):
         if not follow_symlinks:
             raise NotImplementedError(
                 f'Setting follow_symlinks to {follow_symlinks} is unsupported on S3 service.')
-        resource, _ = self.configuration_map.get_configuration(path)
+        resource, config = self.configuration_map.get_configuration(path)
 
-        object_summary = resource.ObjectVersion(path.bucket, path.key, path.version_id).get()
+        response = self._boto3_method_with_parameters(
+            resource.meta.client.head_object,
+            kwargs={'Bucket': path.bucket, 'Key': path.key, 'VersionId': path.version_id},
+            config=config,
+        )
 
         return StatResult(
-            size=object_summary.get('ContentLength'),
-            last_modified=object_summary.get('LastModified'),
-            version_id=object_summary.get('VersionId'),
+            size=response.get('ContentLength'),
+            last_modified=response.get('LastModified'),
+            version_id=response.get('VersionId'),
         )
 
     def exists(self, path):
-        resource, _ = self.configuration_map.get_configuration(path)
-        bucket = resource.Bucket(path.bucket)
+        resource, config = self.configuration_map.get_configuration(path)
+        client = resource.meta.client
         key = path.key
 
-        for obj in bucket.object_versions.filter(Prefix=key):
-            key_match = (obj.key == key) or obj.key.startswith(key + path._flavour.sep)
-            if key_match and (obj.version_id == path.version_id):
-                return True
+        kwargs = self._update_kwargs_with_config(
+            client.list_object_versions,
+            config=config,
+            kwargs={'Bucket': path.bucket, 'Prefix': key})
+        for response in client.get_paginator('list_object_versions').paginate(**kwargs):
+            for version in chain(response.get('Versions', ()), response.get('DeleteMarkers', ())):
+                key_match = (version['Key'] == key) or version['Key'].startswith(key + path._flavour.sep)
+                if key_match and (version['VersionId'] == path.version_id):
+                    return True
 
         return False
 
     def open(self, path, *, mode='r', buffering=-1, encoding=None, errors=None, newline=None):
         resource, config = self.configuration_map.get_configuration(path)
+        if 'r' not in mode:
+            self.metadata_cache.invalidate(resource, path.bucket, path.key)
 
         smart_open_kwargs = {
             'uri': "s3:/" + str(path),
@@ -573,24 +771,18 @@ class _VersionedS3Accessor(_S3Accessor):
             'errors': errors,
             'newline': newline,
         }
-        transport_params = {'defer_seek': True, "version_id": path.version_id}
-        dummy_object = resource.Object('bucket', 'key')
-        if smart_open.__version__ >= '5.1.0':
-            self._smart_open_new_version_kwargs(
-                dummy_object,
-                resource,
-                config,
-                transport_params,
-                smart_open_kwargs)
-        else:
-            self._smart_open_old_version_kwargs(
-                dummy_object,
-                resource,
-                config,
-                transport_params,
-                smart_open_kwargs)
+        transport_params = {
+            'defer_seek': True,
+            'version_id': path.version_id,
+            'buffer_size': max(buffering, _READ_BUFFER_SIZE),
+        }
+        self._smart_open_kwargs(resource, config, transport_params, smart_open_kwargs)
 
         file_object = smart_open.open(**smart_open_kwargs)
+        if 'r' not in mode and self.configuration_map.get_general_options(path)['metadata_cache_ttl']:
+            # The key is replaced only when the writer is closed, a stat made while it was open cached the old key
+            file_object = _CloseCallbackWriter(
+                file_object, partial(self.metadata_cache.invalidate, resource, path.bucket, path.key))
         return file_object
 
 
@@ -710,7 +902,11 @@ class _Selector:
         self._prefix, pattern = self._prefix_splitter(pattern)
         self._full_keys = self._calculate_full_or_just_folder(pattern)
         self._target_level = self._calculate_pattern_level(pattern)
-        self.match = self._path._flavour.compile_pattern_parts(self._path, self._prefix, pattern, path.bucket)
+        if pattern:
+            self.match = self._path._flavour.compile_pattern_parts(self._path, self._prefix, pattern, path.bucket)
+        else:
+            # A pattern without wildcards names a single path, compare strings instead of running a regex
+            self.match = self._literal_target(self._prefix, path.bucket).__eq__
 
     def select(self):
         for target in self._deep_cached_dir_scan():
@@ -756,18 +952,24 @@ class _Selector:
                 return True
         return False
 
+    def _literal_target(self, prefix, bucket):
+        sep = self._path._flavour.sep
+        *_, parts = self._path._flavour.parse_parts((sep.join(('', bucket, prefix)),))
+        return ''.join(f'{sep}{part}' for part in parts if part != sep)
+
     def _deep_cached_dir_scan(self):
         cache = set()
-        prefix_sep_count = self._prefix.count(self._path._flavour.sep)
+        # Called for every listed key, keep the loop on locals
+        sep = self._path._flavour.sep
+        target_level = self._target_level
+        prefix_sep_count = self._prefix.count(sep)
         for key in self._path._accessor.iter_keys(self._path, prefix=self._prefix, full_keys=self._full_keys):
-            key_sep_count = key.count(self._path._flavour.sep) + 1
-            key_parts = key.rsplit(self._path._flavour.sep, maxsplit=key_sep_count - prefix_sep_count)
-            target_path_parts = key_parts[:self._target_level]
+            key_parts = key.rsplit(sep, maxsplit=key.count(sep) + 1 - prefix_sep_count)
             target_path = ''
-            for part in target_path_parts:
+            for part in key_parts[:target_level]:
                 if not part:
                     continue
-                target_path += f'{self._path._flavour.sep}{part}'
+                target_path += sep + part
                 if target_path in cache:
                     continue
                 yield target_path
@@ -784,18 +986,20 @@ def register_configuration_parameter(
         *,
         parameters: Optional[dict] = None,
         resource: Optional[ServiceResource] = None,
-        glob_new_algorithm: Optional[bool] = None):
+        glob_new_algorithm: Optional[bool] = None,
+        metadata_cache_ttl: Optional[float] = None):
     if not isinstance(path, PureS3Path):
         raise TypeError(f'path argument have to be a {PurePath} type. got {type(path)}')
     if parameters and not isinstance(parameters, dict):
         raise TypeError(f'parameters argument have to be a dict type. got {type(path)}')
-    if parameters is None and resource is None and glob_new_algorithm is None:
+    if parameters is None and resource is None and glob_new_algorithm is None and metadata_cache_ttl is None:
         raise ValueError('user have to specify parameters or resource arguments')
     _s3_accessor.configuration_map.set_configuration(
         path,
         resource=resource,
         arguments=parameters,
-        glob_new_algorithm=glob_new_algorithm)
+        glob_new_algorithm=glob_new_algorithm,
+        metadata_cache_ttl=metadata_cache_ttl)
 
 
 class PureS3Path(PurePath):
@@ -827,10 +1031,8 @@ class PureS3Path(PurePath):
         The AWS S3 Bucket name, or ''
         """
         self._absolute_path_validation()
-        with suppress(ValueError):
-            _, bucket, *_ = self.parts
-            return bucket
-        return ''
+        parts = self._parts
+        return parts[1] if len(parts) > 1 else ''
 
     @property
     def is_bucket(self) -> bool:
@@ -845,8 +1047,7 @@ class PureS3Path(PurePath):
         The AWS S3 Key name, or ''
         """
         self._absolute_path_validation()
-        key = self._flavour.sep.join(self.parts[2:])
-        return key
+        return self._flavour.sep.join(self._parts[2:])
 
     @classmethod
     def from_bucket_key(cls, bucket: str, key: str):
@@ -908,6 +1109,15 @@ class S3Path(_PathNotSupportedMixin, Path, PureS3Path):
             return None
         return self._accessor.stat(self, follow_symlinks=follow_symlinks)
 
+    @classmethod
+    def clear_metadata_cache(cls):
+        """
+        Drop all the cached key metadata, so the next stat / exists / is_file call will query S3
+        Relevant only when the metadata cache is enabled, with the metadata_cache_ttl configuration parameter
+        of register_configuration_parameter or the S3PATH_METADATA_CACHE_TTL environment variable (the default ttl)
+        """
+        cls._accessor.metadata_cache.clear()
+
     def exists(self) -> bool:
         """
         Whether the path points to an existing Bucket, key or key prefix.
@@ -937,18 +1147,17 @@ class S3Path(_PathNotSupportedMixin, Path, PureS3Path):
         self._absolute_path_validation()
         if not self.bucket or not self.key:
             return False
-        try:
-            return bool(self.stat())
-        except ClientError:
-            return False
+        return self._accessor.is_file(self)
 
     def iterdir(self) -> Generator[S3Path, None, None]:
         """
         When the path points to a Bucket or a key prefix, yield path objects of the directory contents
         """
         self._absolute_path_validation()
-        for name in self._accessor.listdir(self):
-            yield self._make_child_relpath(name)
+        # Stream the names page by page, a big key prefix isn't held in memory
+        with self._accessor.scandir(self) as scandir_iter:
+            for name in scandir_iter.names():
+                yield self._make_child_relpath(name)
 
     def glob(self, pattern: str) -> Generator[S3Path, None, None]:
         """
@@ -1022,8 +1231,6 @@ class S3Path(_PathNotSupportedMixin, Path, PureS3Path):
         Opens the Bucket key pointed to by the path, returns a Key file object that you can read/write with
         """
         self._absolute_path_validation()
-        if smart_open.__version__ < '4.0.0' and mode.startswith('b'):
-            mode = ''.join(reversed(mode))
         return self._accessor.open(
             self,
             mode=mode,
@@ -1032,14 +1239,22 @@ class S3Path(_PathNotSupportedMixin, Path, PureS3Path):
             errors=errors,
             newline=newline)
 
+    def read_bytes(self) -> bytes:
+        """
+        Returns the content of the Bucket key as bytes,
+        big keys are downloaded with concurrent ranged requests
+        """
+        self._absolute_path_validation()
+        return self._accessor.read_bytes(self)
+
     def owner(self) -> str:
         """
         Returns the name of the user owning the Bucket or key.
         Similarly to boto3's ObjectSummary owner attribute
         """
         self._absolute_path_validation()
-        if not self.is_file():
-            return KeyError('file not found')
+        if not self.bucket or not self.key:
+            raise KeyError('file not found')
         return self._accessor.owner(self)
 
     def rename(self, target: Union[str, S3Path]) -> S3Path:
@@ -1070,11 +1285,13 @@ class S3Path(_PathNotSupportedMixin, Path, PureS3Path):
         self._absolute_path_validation()
         # S3 doesn't care if you remove full prefixes or buckets with its delete API
         # so unless we manually check, this call will be dropped through without any
-        # validation and could result in data loss
+        # validation and could result in data loss.
+        # An existing key is deleted alone even if it is also a prefix of other keys,
+        # the prefix is listed only to tell a directory from a missing key
         try:
-            if self.is_dir():
-                raise IsADirectoryError(str(self))
             if not self.is_file():
+                if self.is_dir():
+                    raise IsADirectoryError(str(self))
                 raise FileNotFoundError(str(self))
         except (IsADirectoryError, FileNotFoundError):
             if missing_ok:
@@ -1094,6 +1311,7 @@ class S3Path(_PathNotSupportedMixin, Path, PureS3Path):
     def rmdir(self):
         """
         Removes this Bucket / key prefix. The Bucket / key prefix must be empty
+        A path that is also a key isn't a directory, NotADirectoryError is raised and no key is deleted
         """
         self._absolute_path_validation()
         if self.is_file():
@@ -1119,9 +1337,10 @@ class S3Path(_PathNotSupportedMixin, Path, PureS3Path):
         the function succeeds if exist_ok is true (and its modification time is updated to the current time),
         otherwise FileExistsError is raised
         """
-        if self.exists() and not exist_ok:
+        self._absolute_path_validation()
+        if not exist_ok and self.exists():
             raise FileExistsError()
-        self.write_text('')
+        self._accessor.touch(self)
 
     def mkdir(self, mode: int = 0o777, parents: bool = False, exist_ok: bool = False):
         """
@@ -1318,37 +1537,19 @@ class VersionedS3Path(PureVersionedS3Path, S3Path):
             self._accessor = _versioned_s3_accessor
 
 
-class StatResult(namedtuple('BaseStatResult', 'size, last_modified, version_id', defaults=(None,))):
-    """
-    Base of os.stat_result but with boto3 s3 features
-    """
-
-    def __getattr__(self, item):
-        if item in vars(stat_result):
-            raise UnsupportedOperation(f'{type(self).__name__} do not support {item} attribute')
-        return super().__getattribute__(item)
-
-    @property
-    def st_size(self) -> int:
-        return self.size
-
-    @property
-    def st_mtime(self) -> float:
-        return self.last_modified.timestamp()
-
-    @property
-    def st_version_id(self) -> str:
-        return self.version_id
-
-
 class _S3DirEntry:
+    # Listings can yield millions of entries, avoid a __dict__ per entry
+    __slots__ = ('name', '_is_dir', '_size', '_last_modified')
+
     def __init__(self, name, is_dir, size=None, last_modified=None):
         self.name = name
         self._is_dir = is_dir
-        self._stat = StatResult(size=size, last_modified=last_modified)
+        # The StatResult is built only for the entries that are asked for it
+        self._size = size
+        self._last_modified = last_modified
 
     def __repr__(self):
-        return f'{type(self).__name__}(name={self.name}, is_dir={self._is_dir}, stat={self._stat})'
+        return f'{type(self).__name__}(name={self.name}, is_dir={self._is_dir}, stat={self.stat()})'
 
     def inode(self, *args, **kwargs):
         return None
@@ -1365,4 +1566,4 @@ class _S3DirEntry:
         return False
 
     def stat(self):
-        return self._stat
+        return StatResult(size=self._size, last_modified=self._last_modified)
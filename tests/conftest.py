@@ -13,6 +13,7 @@ if sys.version_info >= (3, 12):
         accessor.configuration_map.get_configuration.cache_clear()
         accessor.configuration_map.get_general_options.cache_clear()
         accessor.configuration_map.is_setup = False
+        accessor.metadata_cache.clear()
 else:
     from s3path import S3Path
 
@@ -20,6 +21,7 @@ else:
         S3Path._accessor.configuration_map.get_configuration.cache_clear()
         S3Path._accessor.configuration_map.get_general_options.cache_clear()
         S3Path._accessor.configuration_map.is_setup = False
+        S3Path._accessor.metadata_cache.clear()
 
 
 @pytest.fixture()
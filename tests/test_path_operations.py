@@ -10,9 +10,9 @@ import requests
 from botocore.exceptions import ClientError
 import pytest
 
-from s3path import PureS3Path, S3Path, StatResult, VersionedS3Path
+from s3path import PureS3Path, S3Path, StatResult, VersionedS3Path, register_configuration_parameter
 
-# todo: test samefile/touch method
+# todo: test samefile method
 # todo: test security and boto config changes
 
 
@@ -58,11 +58,85 @@ def test_stat(s3_mock):
 
     with pytest.raises(UnsupportedOperation):
         path.stat().st_atime
+    with pytest.raises(AttributeError):
+        path.stat().st_fake_attribute
 
     path = S3Path('/test-bucket')
     assert path.stat() is None
 
 
+def test_stat_metadata_cache(s3_mock):
+    register_configuration_parameter(PureS3Path('/test-bucket'), metadata_cache_ttl=60)
+    s3 = boto3.resource('s3')
+    s3.create_bucket(Bucket='test-bucket')
+    s3.create_bucket(Bucket='not-cached-bucket')
+    object_summary = s3.ObjectSummary('test-bucket', 'directory/Test.test')
+    object_summary.put(Body=b'test data')
+
+    path = S3Path('/test-bucket/directory/Test.test')
+    assert path.stat().size == 9
+
+    # changes from outside of s3path are visible only after the cache is cleared
+    object_summary.put(Body=b'new test data')
+    assert path.stat().size == 9
+    S3Path.clear_metadata_cache()
+    assert path.stat().size == 13
+
+    # changes made by s3path invalidate the cache
+    path.write_bytes(b'data')
+    assert path.stat().size == 4
+    # a stat made while a writer is open is dropped when the writer is closed
+    with path.open('wb') as file_object:
+        file_object.write(b'123456789')
+        assert path.stat().size == 4
+    assert path.stat().size == 9
+    file_object = path.open('w')
+    file_object.write('data')
+    assert path.stat().size == 9
+    file_object.close()
+    assert path.stat().size == 4
+    path.parent.rename('/test-bucket/new-directory/')
+    assert not path.exists()
+    with pytest.raises(ClientError):
+        path.stat()
+
+    # listing a directory caches the stat of its files
+    S3Path.clear_metadata_cache()
+    assert list(S3Path('/test-bucket/new-directory').iterdir()) == [S3Path('/test-bucket/new-directory/Test.test')]
+    s3.ObjectSummary('test-bucket', 'new-directory/Test.test').put(Body=b'new test data')
+    assert S3Path('/test-bucket/new-directory/Test.test').stat().size == 4
+
+    # the ttl is a per path configuration
+    object_summary = s3.ObjectSummary('not-cached-bucket', 'Test.test')
+    object_summary.put(Body=b'test data')
+    path = S3Path('/not-cached-bucket/Test.test')
+    assert path.stat().size == 9
+    object_summary.put(Body=b'new test data')
+    assert path.stat().size == 13
+    # writers of paths without a cache are returned as smart_open opened them
+    with path.open('wb') as file_object:
+        assert type(file_object).__module__.startswith('smart_open')
+
+
+def test_stat_metadata_cache_endpoints(s3_mock):
+    register_configuration_parameter(PureS3Path('/test-bucket'), metadata_cache_ttl=60)
+    s3 = boto3.resource('s3')
+    s3.create_bucket(Bucket='test-bucket')
+    object_summary = s3.ObjectSummary('test-bucket', 'Test.test')
+    object_summary.put(Body=b'test data')
+
+    path = S3Path('/test-bucket/Test.test')
+    assert path.stat().size == 9
+    object_summary.put(Body=b'new test data')
+    assert path.stat().size == 9
+
+    # the entries of a bucket aren't shared by resources of different endpoints
+    register_configuration_parameter(
+        PureS3Path('/test-bucket'),
+        resource=boto3.resource('s3', endpoint_url='https://s3.eu-west-1.amazonaws.com'))
+    assert path.stat().size == 13
+
+
 def test_exists(s3_mock):
     path = S3Path('./fake-key')
     with pytest.raises(ValueError):
@@ -78,6 +152,7 @@ def test_exists(s3_mock):
     object_summary.put(Body=b'test data')
 
     assert not S3Path('/test-bucket/Test.test').exists()
+    assert not S3Path('/test-bucket/directory/Test').exists()
     path = S3Path('/test-bucket/directory/Test.test')
     assert path.exists()
     for parent in path.parents:
@@ -85,6 +160,22 @@ def test_exists(s3_mock):
 
     assert S3Path('/').exists()
 
+    # credentials that can only list the bucket
+    def deny_head_object(**kwargs):
+        raise ClientError({'Error': {'Code': '403', 'Message': 'Forbidden'}}, 'HeadObject')
+
+    resource = boto3.resource('s3')
+    resource.meta.client.meta.events.register('before-call.s3.HeadObject', deny_head_object)
+    register_configuration_parameter(PureS3Path('/test-bucket'), resource=resource)
+    with pytest.raises(ClientError):
+        path.stat()
+    # is_file answers only not found errors, the denied HeadObject is raised
+    with pytest.raises(ClientError):
+        path.is_file()
+    assert path.exists()
+    assert S3Path('/test-bucket/directory').exists()
+    assert not S3Path('/test-bucket/directory/Test').exists()
+
 
 def test_glob(s3_mock):
     s3 = boto3.resource('s3')
@@ -121,6 +212,11 @@ def test_glob(s3_mock):
     assert sorted(S3Path.from_uri('s3://test-bucket/').glob('*cs')) == [S3Path('/test-bucket/docs/')]
     assert sorted(S3Path.from_uri('s3://test-bucket/').glob('docs/')) == [S3Path('/test-bucket/docs/')]
 
+    object_summary = s3.ObjectSummary('test-bucket', 'docs/conf.py.bak')
+    object_summary.put(Body=b'test data')
+    assert list(S3Path('/test-bucket/').glob('docs/conf.py')) == [S3Path('/test-bucket/docs/conf.py')]
+    assert list(S3Path('/test-bucket/docs').glob('conf.py')) == [S3Path('/test-bucket/docs/conf.py')]
+
 
 def test_glob_nested_folders_issue_no_115(s3_mock):
     s3 = boto3.resource('s3')
@@ -489,6 +585,19 @@ def test_iterdir_on_buckets(s3_mock):
     ]
 
 
+def test_iterdir_more_than_one_page(s3_mock):
+    s3 = boto3.resource('s3')
+    s3.create_bucket(Bucket='test-bucket')
+    for index in range(1001):
+        s3.ObjectSummary('test-bucket', f'directory/{index:04}.txt').put(Body=b'')
+
+    path = S3Path('/test-bucket/directory')
+    assert sorted(path.iterdir()) == [
+        S3Path(f'/test-bucket/directory/{index:04}.txt')
+        for index in range(1001)
+    ]
+
+
 def test_empty_directory(s3_mock):
     s3 = boto3.resource('s3')
     s3.create_bucket(Bucket='test-bucket')
@@ -618,6 +727,31 @@ def test_read_bytes(s3_mock):
     path = S3Path('/test-bucket/directory/Test.test')
     assert path.read_bytes() == b'test data'
 
+    s3.ObjectSummary('test-bucket', 'directory/Empty.test').put(Body=b'')
+    assert S3Path('/test-bucket/directory/Empty.test').read_bytes() == b''
+
+
+def test_read_bytes_ranged(s3_mock, monkeypatch):
+    if sys.version_info >= (3, 12):
+        from s3path import accessor as implementation
+    else:
+        from s3path import old_versions as implementation
+    monkeypatch.setattr(implementation, '_RANGED_READ_CHUNK_SIZE', 4)
+    s3 = boto3.resource('s3')
+    s3.create_bucket(Bucket='test-bucket')
+    for data in (b'test', b'test data', b'test data!!!'):
+        s3.ObjectSummary('test-bucket', 'directory/Test.test').put(Body=data)
+        assert S3Path('/test-bucket/directory/Test.test').read_bytes() == data
+
+    # servers may ignore the range and send the whole object
+    def ignore_range(params, **kwargs):
+        params.pop('Range', None)
+
+    resource = boto3.resource('s3')
+    resource.meta.client.meta.events.register('before-parameter-build.s3.GetObject', ignore_range)
+    register_configuration_parameter(PureS3Path('/test-bucket'), resource=resource)
+    assert S3Path('/test-bucket/directory/Test.test').read_bytes() == b'test data!!!'
+
 
 def test_open_text_read(s3_mock):
     s3 = boto3.resource('s3')
@@ -653,6 +787,10 @@ def test_owner(s3_mock):
 
     path = S3Path('/test-bucket/directory/Test.test')
     assert path.owner() == 'webfile'
+    with pytest.raises(KeyError):
+        S3Path('/test-bucket/directory/Test').owner()
+    with pytest.raises(KeyError):
+        S3Path('/test-bucket/directory').owner()
 
 
 def test_rename_s3_to_s3(s3_mock):
@@ -764,6 +902,78 @@ def test_rmdir_can_remove_bucket(s3_mock):
     assert not bucket.exists()
 
 
+def test_rename_and_rmdir_more_than_one_batch(s3_mock):
+    s3 = boto3.resource('s3')
+    s3.create_bucket(Bucket='test-bucket')
+    for index in range(1001):
+        s3.ObjectSummary('test-bucket', f'directory/{index:04}.txt').put(Body=b'')
+
+    source = S3Path('/test-bucket/directory')
+    target = source.rename('/test-bucket/new-directory')
+    assert not source.exists()
+    assert sum(1 for _ in target.iterdir()) == 1001
+
+    target.rmdir()
+    assert not target.exists()
+    assert list(S3Path('/test-bucket').iterdir()) == []
+
+
+def test_rename_and_rmdir_sibling_prefix(s3_mock):
+    s3 = boto3.resource('s3')
+    s3.create_bucket(Bucket='test-bucket')
+    s3.ObjectSummary('test-bucket', 'dir/dir/file.txt').put(Body=b'')
+    s3.ObjectSummary('test-bucket', 'dir2/file.txt').put(Body=b'')
+
+    target = S3Path('/test-bucket/dir').rename('/test-bucket/new')
+    assert S3Path('/test-bucket/new/dir/file.txt').is_file()
+    assert S3Path('/test-bucket/dir2/file.txt').is_file()
+
+    target.rmdir()
+    assert not target.exists()
+    assert S3Path('/test-bucket/dir2/file.txt').is_file()
+
+
+def test_rename_key_that_is_also_a_prefix(s3_mock):
+    s3 = boto3.resource('s3')
+    s3.create_bucket(Bucket='test-bucket')
+    s3.ObjectSummary('test-bucket', 'dir').put(Body=b'key data')
+    s3.ObjectSummary('test-bucket', 'dir/file.txt').put(Body=b'test data')
+
+    target = S3Path('/test-bucket/dir').rename('/test-bucket/new')
+    assert sorted(summary.key for summary in s3.Bucket('test-bucket').objects.all()) == ['new', 'new/file.txt']
+    assert target.read_bytes() == b'key data'
+    assert (target / 'file.txt').read_bytes() == b'test data'
+
+
+def test_rmdir_key_that_is_also_a_prefix(s3_mock):
+    s3 = boto3.resource('s3')
+    s3.create_bucket(Bucket='test-bucket')
+    s3.ObjectSummary('test-bucket', 'dir').put(Body=b'key data')
+    s3.ObjectSummary('test-bucket', 'dir/file.txt').put(Body=b'test data')
+
+    with pytest.raises(NotADirectoryError):
+        S3Path('/test-bucket/dir').rmdir()
+    assert sorted(summary.key for summary in s3.Bucket('test-bucket').objects.all()) == ['dir', 'dir/file.txt']
+
+
+def test_rename_managed_copy(s3_mock, monkeypatch):
+    if sys.version_info >= (3, 12):
+        from s3path import accessor as implementation
+    else:
+        from s3path import old_versions as implementation
+    # every key of the prefix is copied with the managed copy of the workers
+    monkeypatch.setattr(implementation, '_MULTIPART_COPY_THRESHOLD', 0)
+    s3 = boto3.resource('s3')
+    s3.create_bucket(Bucket='test-bucket')
+    s3.ObjectSummary('test-bucket', 'directory/file.txt').put(Body=b'test data')
+    s3.ObjectSummary('test-bucket', 'directory/sub/file.txt').put(Body=b'test data')
+
+    target = S3Path('/test-bucket/directory').rename('/test-bucket/new-directory')
+    assert not S3Path('/test-bucket/directory').exists()
+    assert (target / 'file.txt').read_bytes() == b'test data'
+    assert (target / 'sub/file.txt').read_bytes() == b'test data'
+
+
 def test_mkdir(s3_mock):
     s3 = boto3.resource('s3')
 
@@ -784,6 +994,22 @@ def test_mkdir(s3_mock):
     assert s3.Bucket('test-second-bucket') in s3.buckets.all()
 
 
+def test_touch(s3_mock):
+    s3 = boto3.resource('s3')
+    s3.create_bucket(Bucket='test-bucket')
+
+    path = S3Path('/test-bucket/directory/Test.test')
+    path.touch()
+    assert path.is_file()
+    assert path.read_bytes() == b''
+
+    path.touch()
+    with pytest.raises(FileExistsError):
+        path.touch(exist_ok=False)
+    with pytest.raises(FileExistsError):
+        path.parent.touch(exist_ok=False)
+
+
 def test_write_text(s3_mock):
     s3 = boto3.resource('s3')
 
@@ -838,6 +1064,12 @@ def test_unlink(s3_mock):
     S3Path("/test-bucket/fake_folder").unlink(missing_ok=True)
     S3Path("/fake-bucket/").unlink(missing_ok=True)
 
+    # a key that is also a prefix of other keys is removed alone
+    S3Path('/test-bucket/fake_folder').write_text('key and prefix')
+    S3Path('/test-bucket/fake_folder').unlink()
+    assert S3Path('/test-bucket/fake_folder').is_file() is False
+    assert subdir_key.exists() is True
+
 
 def test_absolute(s3_mock):
     s3 = boto3.resource('s3')
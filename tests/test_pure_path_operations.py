@@ -68,6 +68,9 @@ def test_parts():
     assert PureS3Path('../bar').parts == ('..', 'bar')
     assert PureS3Path('foo', '../bar').parts == ('bar',)
     assert PureS3Path('/foo/bar').parts == ('/', 'foo', 'bar')
+    assert PureS3Path('foo/bar/../../baz').parts == ('baz',)
+    assert PureS3Path('/foo/bar/../../baz').parts == ('/', 'baz')
+    assert PureS3Path('/foo/a/../b/../c').parts == ('/', 'foo', 'c')
 
 
 @pytest.mark.parametrize("path", ["/foo", "/foo/"])
@@ -1,6 +1,7 @@
 
 import sys
 import pytest
+import subprocess
 import smart_open
 from pathlib import Path
 from packaging.version import Version
@@ -13,23 +14,39 @@ from s3path import S3Path, PureS3Path, register_configuration_parameter
 
 if sys.version_info >= (3, 12):
     from s3path import accessor
-    _config_key_parser = str
 else:
     accessor = S3Path._accessor
-    _config_key_parser = lambda path: path
 
 
 def test_s3_configuration_map_repr():
     assert repr(accessor.configuration_map)
 
 
+def test_action_arguments():
+    resource = boto3.resource('s3', region_name='us-east-1')
+    assert {'Bucket', 'Key', 'ExpectedBucketOwner'} <= accessor._get_action_arguments(resource.meta.client.head_object)
+    # resource actions are new objects for every resource, the parsed docstring is reused
+    bucket_delete_arguments = accessor._get_action_arguments(resource.Bucket('foo').delete)
+    assert 'ExpectedBucketOwner' in bucket_delete_arguments
+    assert accessor._get_action_arguments(resource.Bucket('bar').delete) is bucket_delete_arguments
+
+
+def test_import_does_not_setup_resources():
+    code = (
+        'import sys, s3path; '
+        'assert not s3path.configuration_map.is_setup; '
+        'assert sys.version_info < (3, 12) or "botocore" not in sys.modules'
+    )
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+
 def test_basic_configuration(reset_configuration_cache):
     path = S3Path('/foo/')
 
     accessor.configuration_map.arguments = accessor.configuration_map.resources = None
 
-    assert _config_key_parser(path) not in (accessor.configuration_map.arguments or ())
-    assert _config_key_parser(path) not in (accessor.configuration_map.resources or ())
+    assert str(path) not in (accessor.configuration_map.arguments or ())
+    assert str(path) not in (accessor.configuration_map.resources or ())
     assert accessor.configuration_map.get_configuration(path) == (
         accessor.configuration_map.default_resource, {})
 
@@ -51,8 +68,8 @@ def test_register_configuration_exceptions(reset_configuration_cache):
 def test_hierarchical_configuration(reset_configuration_cache):
     path = S3Path('/foo/')
     register_configuration_parameter(path, parameters={'ContentType': 'text/html'})
-    assert _config_key_parser(path) in accessor.configuration_map.arguments
-    assert _config_key_parser(path) not in accessor.configuration_map.resources
+    assert str(path) in accessor.configuration_map.arguments
+    assert str(path) not in accessor.configuration_map.resources
     assert accessor.configuration_map.get_configuration(path) == (
         accessor.configuration_map.default_resource, {'ContentType': 'text/html'})
 